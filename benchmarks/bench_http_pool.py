@@ -0,0 +1,65 @@
+"""Requests per second of bare requests.get against the pooled get_tree, on a local keep-alive HTTP/1.1 server.
+
+Run from the root of the repository:
+
+    python benchmarks/bench_http_pool.py [number of requests]
+"""
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
+from time import perf_counter
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import utils  # noqa: E402
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    body = b'<html><body><p>x</p></body></html>'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, f'http://127.0.0.1:{server.server_port}/'
+
+
+def measure(fetch, url, count):
+    started = perf_counter()
+
+    for _ in range(count):
+        fetch(url)
+
+    return count / (perf_counter() - started)
+
+
+def main(count=2000):
+    server, url = start_server()
+
+    try:
+        bare = measure(lambda u: requests.get(u, timeout=15), url, count)
+        pooled = measure(utils.get_tree, url, count)
+    finally:
+        server.shutdown()
+
+    print(f'{count} sequential GETs | bare requests.get: {bare:.0f} req/s | pooled get_tree: {pooled:.0f} req/s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,82 @@
+"""Timings of cleanup_text and normalize_whitespace_batch against the loop cleanup_text used before.
+
+The outputs are checked to be equal on random inputs first. Run from the root of the repository:
+
+    python benchmarks/bench_normalize_whitespace.py
+"""
+import random
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import utils  # noqa: E402
+
+
+def old_cleanup_text(text):
+    """The cleanup_text loop before normalize_whitespace, kept here for the comparison."""
+    new_text = text
+
+    while True:
+
+        if '\r' in new_text:
+            new_text = new_text.replace('\r', '').strip()
+
+        if '\n' in new_text:
+            new_text = new_text.replace('\n', ' ').strip()
+
+        if '  ' in new_text:
+            new_text = new_text.replace('  ', ' ').strip()
+
+        if '\n' not in new_text and '  ' not in new_text:
+            return new_text
+
+
+def check_equivalence(count=20000):
+    rng = random.Random(1)
+
+    for _ in range(count):
+        text = ''.join(rng.choice(' \n\r\tab') for _ in range(rng.randint(0, 30)))
+
+        assert old_cleanup_text(text).strip() == utils.cleanup_text(text), repr(text)
+
+
+def time_per_call(func, text, count):
+    started = perf_counter()
+
+    for _ in range(count):
+        func(text)
+
+    return (perf_counter() - started) * 1000 / count
+
+
+def main():
+    check_equivalence()
+
+    for name, text, count in (('100 KB prose', ('word ' * 5 + '\n') * 3000, 200),
+                              ('1 MB run of spaces', 'a' + ' ' * 1000000 + 'b', 5),
+                              ('200 KB alternating', ' \n' * 100000, 20)):
+        old = time_per_call(old_cleanup_text, text, count)
+        new = time_per_call(utils.cleanup_text, text, count)
+        print(f'{name}: old {old:.3f} ms | new {new:.3f} ms')
+
+    texts = [f'  item {i}\n\n  name   x ' for i in range(100000)]
+
+    started = perf_counter()
+    [old_cleanup_text(text) for text in texts]
+    old = perf_counter() - started
+
+    started = perf_counter()
+    [utils.cleanup_text(text) for text in texts]
+    new = perf_counter() - started
+
+    started = perf_counter()
+    utils.normalize_whitespace_batch(texts)
+    batch = perf_counter() - started
+
+    print(f'100k short strings: old {old:.3f} s | new per item {new:.3f} s | new batched {batch:.3f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,41 @@
-﻿import csv
+﻿import asyncio
+import atexit
+import base64
+import csv
+import gzip
+import hashlib
 import io
+import json
+import math
 import os
 import platform
 import random
+import re
 import shutil
+import sqlite3
 import string
+import struct
 import subprocess
 import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from fnmatch import fnmatchcase
+from functools import lru_cache, partial
+from multiprocessing import Pool
 from glob import glob
+from itertools import islice
 from pathlib import Path
-from threading import Thread
-from time import sleep, time
+from queue import Empty, Queue
+from threading import Lock, Thread, local, main_thread
+from time import monotonic, sleep, time
+from urllib.parse import urlparse
 from zipfile import ZipFile
 
 import requests
+import requests.adapters
 import requests.auth
 import wget
 from lxml import html, etree
@@ -26,6 +47,23 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select
 from selenium.webdriver.support.wait import WebDriverWait
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import boto3
+    import boto3.s3.transfer
+except ImportError:
+    boto3 = None
+
 
 # Global Variables
 start_time = time()
@@ -38,6 +76,44 @@ resources_path = f'{local_storage_path}/Resources'
 chrome_executable_filename = '/chromedriver.exe'
 chrome_driver_downloads_url = 'https://chromedriver.chromium.org/downloads'
 
+# URL patterns blocked by the fast profile of load_driver, per resource type.
+blocked_resource_patterns = {
+    'image': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp', '*.avif'],
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'media': ['*.mp4', '*.webm', '*.mp3', '*.ogg', '*.wav', '*.m3u8', '*.ts?*'],
+    'stylesheet': ['*.css'],
+    'tracker': ['*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*connect.facebook.net*',
+                '*hotjar.com*', '*scorecardresearch.com*'],
+}
+
+# Whitespace normalisation used by cleanup_text and get_tag_text.
+_spaces_pattern = re.compile('  +')
+
+# HTTP connection pool shared by every session handed out by get_session().
+http_pool_connections = 10
+http_pool_maxsize = 32
+
+_http_adapter = None
+_http_adapter_pid = None
+_http_adapter_lock = Lock()
+_http_sessions = local()
+
+# Threads uploading the batches of upload_files_to_aws, by destination directory.
+_upload_threads = {}
+
+# Pipelines of upload_files_to_aws, by project name and AWS CSV file.
+_upload_pipelines = {}
+_upload_pipelines_lock = Lock()
+
+# Waits of the Selenium helpers after their actions, see configure_waits().
+adaptive_waits = False
+adaptive_wait_quiet_ms = 150
+adaptive_wait_timeout = 10
+adaptive_wait_factor = 5
+
+_wait_stats = {}
+_wait_stats_lock = Lock()
+
 # General Configurations
 requests.packages.urllib3.disable_warnings()
 
@@ -64,7 +140,131 @@ def get_writer(file_name, _mode='w', _encoding='utf-8'):
     return io.open(file_name, mode=_mode, encoding=_encoding)
 
 
-def get_csv_writer(file_name, _mode='w', _encoding='utf-8', _delimiter=','):
+class CSVWriter:
+    """This class writes rows to a CSV file through a buffer of rows that is flushed by row count or by time.
+
+    It is safe to share between threads, it can be used as a context manager and it can checkpoint the file
+    with fsync, so the rows written before a checkpoint survive a crash of the machine.
+
+    Args:
+        file_name (str): The name of the file
+        _mode (char): The mode in which you want to open the file, writing is the default mode
+        _encoding (str): The file encoding, default value is UTF-8
+        _delimiter (char): Default is comma in most of the cases, rarely a pipe symbol |
+        _buffer_rows (int): The number of rows kept in memory before they are written to the file
+        _flush_interval (float): The number of seconds after which buffered rows are written on the next write call
+        _fsync_rows (int): If provided then the file is checkpointed with fsync after every this many rows
+        _fsync_interval (float): If provided then the file is checkpointed with fsync on the next write call
+                                 after this many seconds
+        _buffering (int): The size in bytes of the buffer of the underlying file
+
+    Raises:
+        FileNotFoundError: If filename is not valid
+        ValueError: If mode is not valid
+        LookupError: If encoding is not correct
+    """
+
+    def __init__(self, file_name, _mode='w', _encoding='utf-8', _delimiter=',', _buffer_rows=1000, _flush_interval=5,
+                 _fsync_rows=None, _fsync_interval=None, _buffering=1024 * 1024):
+        self.file_name = file_name
+
+        self.buffer_rows = _buffer_rows
+        self.flush_interval = _flush_interval
+        self.fsync_rows = _fsync_rows
+        self.fsync_interval = _fsync_interval
+
+        self._file = open(file_name, mode=_mode, encoding=_encoding, errors='ignore', buffering=_buffering)
+        self._writer = csv.writer(self._file, delimiter=_delimiter, lineterminator='\n')
+
+        self._rows = []
+        self._lock = Lock()
+        self._rows_since_fsync = 0
+        self._flushed_at = self._fsynced_at = monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def writerow(self, row):
+        """This function buffers a single row."""
+        self.writerows([row])
+
+    def writerows(self, rows):
+        """This function buffers a batch of rows and writes the buffer out when a flush policy is due."""
+
+        with self._lock:
+            self._rows.extend(rows)
+
+            now = monotonic()
+
+            if len(self._rows) >= self.buffer_rows or \
+                    (self.flush_interval is not None and now - self._flushed_at >= self.flush_interval):
+                self._flush_rows(now)
+
+            if (self.fsync_rows and self._rows_since_fsync >= self.fsync_rows) or \
+                    (self.fsync_interval is not None and now - self._fsynced_at >= self.fsync_interval):
+                self._flush_rows(now)
+                self._fsync(now)
+
+    def flush(self, _fsync=False):
+        """This function writes the buffered rows to the file.
+
+        Args:
+            _fsync (bool): If True then the file is also checkpointed to the disk with fsync.
+        """
+        with self._lock:
+            now = monotonic()
+            self._flush_rows(now)
+
+            if _fsync:
+                self._fsync(now)
+
+    def checkpoint(self):
+        """This function makes sure every row written so far is on the disk."""
+        self.flush(_fsync=True)
+
+    def close(self):
+        """This function writes the buffered rows and closes the file."""
+
+        with self._lock:
+
+            if self._file.closed:
+                return
+
+            self._flush_rows(monotonic())
+            self._file.close()
+
+    def _flush_rows(self, now):
+
+        if self._rows:
+            self._writer.writerows(self._rows)
+            self._rows_since_fsync += len(self._rows)
+            self._rows = []
+
+        self._file.flush()
+        self._flushed_at = now
+
+    def _fsync(self, now):
+        os.fsync(self._file.fileno())
+
+        self._rows_since_fsync = 0
+        self._fsynced_at = now
+
+
+def get_csv_writer(file_name, _mode='w', _encoding='utf-8', _delimiter=',', **kwargs):
     """This function returns an object of the CSV file in the specified mode.
 
         Args:
@@ -72,6 +272,11 @@ def get_csv_writer(file_name, _mode='w', _encoding='utf-8', _delimiter=','):
             _mode (char): The mode in which you want to open the file, writing is the default mode
             _encoding (str): The file encoding, default value is UTF-8
             _delimiter (char): Default is comma in most of the cases, rarely a pipe symbol |
+            **kwargs: The buffering and flush policies accepted by CSVWriter, e.g. _buffer_rows or _fsync_interval
+
+        A file name ending with .parquet, .jsonl or .jsonl.gz returns the matching record writer of get_record_writer
+        instead, so scrapers switch to compressed or columnar output by changing only the output file name.
+        The encoding, delimiter and CSV flush policies are ignored then, _buffer_rows is the batch size of JSON lines.
 
         Raises:
             FileNotFoundError: If filename is not valid
@@ -79,42 +284,341 @@ def get_csv_writer(file_name, _mode='w', _encoding='utf-8', _delimiter=','):
             LookupError: If encoding is not correct
 
         Returns:
-            File (object): The object of the CSV file to write
+            File (CSVWriter | RecordWriter): The object of the file to write, close it (or use it in a with block) when done
+    """
+    if file_name.endswith(('.parquet', '.jsonl', '.jsonl.gz')):
+        # The flush and fsync policies of CSVWriter do not apply to the record writers, a JSON lines file takes
+        # the row buffer as its batch size, a Parquet file keeps its row groups.
+        buffer_rows = kwargs.pop('_buffer_rows', None)
+
+        for name in ('_flush_interval', '_fsync_rows', '_fsync_interval', '_buffering'):
+            kwargs.pop(name, None)
+
+        if buffer_rows is not None and not file_name.endswith('.parquet'):
+            kwargs.setdefault('_batch_rows', buffer_rows)
+
+        return get_record_writer(file_name, _mode=_mode, **kwargs)
+
+    return CSVWriter(file_name, _mode=_mode, _encoding=_encoding, _delimiter=_delimiter, **kwargs)
+
+
+class RecordWriter:
+    """This class is the base of the record sinks that accept the same rows as the CSV writer.
+
+    If the header is not provided, the first row written is taken as the header, just like scrapers
+    write the header row first to a CSV file. Rows are buffered and written in batches.
+
+    Args:
+        file_name (str): The name of the file
+        _header (list): The names of the columns
+        _batch_rows (int): The number of rows kept in memory before they are written to the file
+    """
+
+    def __init__(self, file_name, _header=None, _batch_rows=10000):
+        self.file_name = file_name
+        self.header = list(_header) if _header else None
+        self.batch_rows = _batch_rows
+
+        self._rows = []
+        self._lock = Lock()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def writerow(self, row):
+        self.writerows([row])
+
+    def writerows(self, rows):
+
+        with self._lock:
+
+            for row in rows:
+
+                if self.header is None:
+                    self.header = [str(column) for column in row]
+                else:
+                    self._rows.append(row)
+
+            if len(self._rows) >= self.batch_rows:
+                self._write_rows()
+
+    def flush(self):
+
+        with self._lock:
+            self._write_rows()
+
+    def close(self):
+
+        with self._lock:
+
+            if self._closed:
+                return
+
+            self._write_rows()
+            self._close()
+            self._closed = True
+
+    def _write_rows(self):
+
+        for index in range(0, len(self._rows), self.batch_rows):
+            self._write_batch(self._rows[index:index + self.batch_rows])
+
+        self._rows = []
+
+    def _write_batch(self, rows):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class JSONLinesWriter(RecordWriter):
+    """This class writes every row as a JSON object on its own line, gzip compressed if the name ends with .gz
+
+    Args:
+        file_name (str): The name of the file, e.g. records.jsonl.gz
+        _mode (char): The mode in which you want to open the file, writing is the default mode
+        _header (list): The names of the columns, if not provided then it is read from the first line of a file
+                        being appended to, Otherwise the first row written is the header
+        _batch_rows (int): The number of rows kept in memory before they are written to the file
+        _compresslevel (int): The gzip compression level from 1 (fastest) to 9 (smallest)
+    """
+
+    def __init__(self, file_name, _mode='w', _header=None, _batch_rows=10000, _compresslevel=6):
+
+        if _header is None and _mode.startswith('a'):
+            _header = self.read_header(file_name)
+
+        super().__init__(file_name, _header=_header, _batch_rows=_batch_rows)
+
+        if file_name.endswith('.gz'):
+            self._file = gzip.open(file_name, mode=f'{_mode}t', encoding='utf-8', errors='ignore',
+                                   compresslevel=_compresslevel)
+        else:
+            self._file = open(file_name, mode=_mode, encoding='utf-8', errors='ignore')
+
+    @staticmethod
+    def read_header(file_name):
+        """This function returns the keys of the first record of an existing file, Otherwise None"""
+        opener = gzip.open if file_name.endswith('.gz') else open
+
+        try:
+            with opener(file_name, mode='rt', encoding='utf-8', errors='ignore') as f:
+                line = f.readline()
+        except (OSError, EOFError):
+            return None
+
+        return list(json.loads(line)) if line.strip() else None
+
+    def _write_batch(self, rows):
+        header = self.header
+
+        self._file.write(''.join(json.dumps(dict(zip(header, row)), ensure_ascii=False, default=str) + '\n'
+                                 for row in rows))
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class ParquetWriter(RecordWriter):
+    """This class writes the rows to a Parquet file in row groups, every column is stored as a string.
+
+    Args:
+        file_name (str): The name of the file, e.g. records.parquet
+        _header (list): The names of the columns, the first row written is the header if not provided
+        _row_group_size (int): The number of rows written per row group
+        _compression (str): The compression codec of the columns, e.g. zstd, snappy or gzip
+
+    Raises:
+        ImportError: If the pyarrow module is not installed.
+    """
+
+    def __init__(self, file_name, _header=None, _row_group_size=100000, _compression='zstd'):
+
+        if pyarrow is None:
+            raise ImportError('The pyarrow module is required for writing Parquet files.')
+
+        super().__init__(file_name, _header=_header, _batch_rows=_row_group_size)
+
+        self.compression = _compression
+        self._writer = None
+
+    def _write_batch(self, rows):
+        columns = [[] for _ in self.header]
+
+        for row in rows:
+
+            for index, column in enumerate(columns):
+                value = row[index] if index < len(row) else None
+                column.append(None if value is None else str(value))
+
+        table = pyarrow.table({name: pyarrow.array(column, type=pyarrow.string())
+                               for name, column in zip(self.header, columns)})
+
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(self.file_name, table.schema, compression=self.compression)
+
+        self._writer.write_table(table)
+
+    def _close(self):
+
+        if self._writer is None and self.header is not None:
+            self._write_batch([])
+
+        if self._writer is not None:
+            self._writer.close()
+
+
+def get_record_writer(file_name, _mode='w', _header=None, **kwargs):
+    """This function returns a writer of the records whose format is chosen by the extension of the file name.
+
+    Files ending with .parquet are written in columnar row groups (pyarrow is required), files ending with
+    .jsonl or .jsonl.gz are written as (compressed) JSON lines and any other file is written as CSV.
+
+    Args:
+        file_name (str): The name of the file
+        _mode (char): The mode in which you want to open the file, writing is the default mode
+        _header (list): The names of the columns, the first row written is the header if not provided
+        **kwargs: The options of the chosen writer, e.g. _row_group_size or _compresslevel
+
+    Raises:
+        ValueError: If a Parquet file is opened in a mode other than writing
+
+    Returns:
+        writer (RecordWriter | CSVWriter): The object to write the rows with writerow / writerows
     """
-    writer = csv.writer(open(file_name, mode=_mode, encoding=_encoding, errors='ignore'),
-                        delimiter=_delimiter,
-                        lineterminator='\n')
+    if file_name.endswith('.parquet'):
+
+        if _mode != 'w':
+            raise ValueError('Parquet files can only be written from the start, use the "w" mode.')
+
+        return ParquetWriter(file_name, _header=_header, **kwargs)
+
+    if file_name.endswith(('.jsonl', '.jsonl.gz')):
+        return JSONLinesWriter(file_name, _mode=_mode, _header=_header, **kwargs)
+
+    writer = CSVWriter(file_name, _mode=_mode, **kwargs)
+
+    if _header:
+        writer.writerow(_header)
 
     return writer
 
 
-def read_csv_as_list(file_name):
-    items = []
+def read_csv_header(file_name):
+    """This function reads only the header row of the CSV file.
 
-    reader = csv.reader(open(file_name, 'r', errors='ignore', encoding='utf-8'), delimiter=',',
-                        lineterminator='\n')
-    header = next(reader)
+    Args:
+        file_name (str): The name of the CSV file
 
-    for row in reader:
-        items.append(row)
+    Returns:
+        header (list): The header row, an empty list if the file is empty
+    """
+    with open(file_name, 'r', errors='ignore', encoding='utf-8') as f:
+        return next(csv.reader(f, delimiter=',', lineterminator='\n'), [])
 
-    return items, header
 
+def iter_csv_rows(file_name, _chunk_size=None, _skip_header=True):
+    """This function streams the rows of the CSV file instead of loading the whole file into memory.
 
-def read_csv_as_dict(file_name, key_index=0, value_index=999):
-    items = {}
+    The file is opened on the first iteration and closed once the rows are exhausted
+    (or when the generator is closed or garbage collected).
+
+    Args:
+        file_name (str): The name of the CSV file
+        _chunk_size (int): If provided then lists of up to this many rows are yielded instead of single rows
+        _skip_header (bool): If True then the header row is not yielded
+
+    Yields:
+        row (list): Every row of the CSV file, or a list of rows when _chunk_size is provided
+    """
+    with open(file_name, 'r', errors='ignore', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter=',', lineterminator='\n')
+
+        if _skip_header:
+            next(reader, None)
+
+        if not _chunk_size:
+            yield from reader
+            return
+
+        while True:
+            chunk = list(islice(reader, _chunk_size))
 
-    reader = csv.reader(open(file_name, 'r', errors='ignore', encoding='utf-8'), delimiter=',',
-                        lineterminator='\n')
-    header = next(reader)
+            if not chunk:
+                return
 
-    for row in reader:
-        card_id = row[key_index]
+            yield chunk
+
+
+def _iter_csv_items(rows, key_index, value_index):
+    """This function yields the (key, value) pairs of the rows, skipping rows whose value column is empty."""
+
+    for row in rows:
 
         if value_index == 999:
-            items[card_id] = row
+            yield row[key_index], row
         elif row[value_index]:
-            items[card_id] = row[value_index]
+            yield row[key_index], row[value_index]
+
+
+def iter_csv_items(file_name, key_index=0, value_index=999, _chunk_size=None):
+    """This function streams the rows of the CSV file as (key, value) pairs, the same pairs read_csv_as_dict stores.
+
+    Args:
+        file_name (str): The name of the CSV file
+        key_index (int): The index of the column used as the key
+        value_index (int): The index of the column used as the value, 999 means the whole row
+        _chunk_size (int): If provided then lists of up to this many pairs are yielded instead of single pairs
+
+    Yields:
+        item (tuple): Every (key, value) pair, or a list of pairs when _chunk_size is provided
+    """
+    if not _chunk_size:
+        yield from _iter_csv_items(iter_csv_rows(file_name), key_index, value_index)
+        return
+
+    for chunk in iter_csv_rows(file_name, _chunk_size=_chunk_size):
+        items = list(_iter_csv_items(chunk, key_index, value_index))
+
+        if items:
+            yield items
+
+
+def read_csv_as_list(file_name):
+
+    with open(file_name, 'r', errors='ignore', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter=',', lineterminator='\n')
+        header = next(reader)
+
+        items = list(reader)
+
+    return items, header
+
+
+def read_csv_as_dict(file_name, key_index=0, value_index=999):
+
+    with open(file_name, 'r', errors='ignore', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter=',', lineterminator='\n')
+        header = next(reader)
+
+        items = dict(_iter_csv_items(reader, key_index, value_index))
 
     try:
         items['']
@@ -210,6 +714,22 @@ def get_random_string(length, only_digits=False):
     return result_str
 
 
+@lru_cache(maxsize=4096)
+def compile_xpath(xpath):
+    """This function compiles the xpath once and returns the cached compiled xpath on every later call.
+
+    Args:
+        xpath (str): The xpath that needs to be compiled
+
+    Raises:
+        XPathSyntaxError: If the xpath is not valid
+
+    Returns:
+        compiled_xpath (XPath): The compiled xpath that can be called with a tree
+    """
+    return etree.XPath(xpath)
+
+
 def get_tag_text(tree, xpath, _separator=''):
     """This function extracts all the text from a tree like structured element.
 
@@ -221,48 +741,116 @@ def get_tag_text(tree, xpath, _separator=''):
     Returns:
         plain_text (str): The plain readable text
     """
-    content = ''
+    results = compile_xpath(xpath)(tree)
 
-    results = tree.xpath(xpath)
+    # Every result is normalised on its own, so line breaks used as the separator are kept.
+    if not _separator:
+        return normalize_whitespace(str(results[0]), _escaped_newlines=True) if results else ''
 
-    for result in results:
-        content += str(result).strip()
+    return _separator.join([normalize_whitespace(str(result), _escaped_newlines=True) for result in results])
 
-        if _separator:
-            content += _separator
-        else:
-            return content.replace('\\n', ' ').replace('  ', ' ').strip()
 
-    if _separator and _separator in content:
-        content = content[0:-len(_separator)]
+def get_tags_text(tree, fields):
+    """This function extracts a whole schema of fields from a tree like structured element in one call.
+
+    Args:
+        tree (elem): A tree like structure
+        fields (dict): The names of the fields as keys and their xpaths as values,
+                       a value can also be a tuple of (xpath, separator) to join multiple elements,
+                       or (xpath, separator, clean) where clean is a function applied to the text, e.g. cleanup_text
+
+    Returns:
+        values (dict): The names of the fields as keys and their plain readable text as values
+    """
+    values = {}
 
-    return content.replace('\\n', ' ').replace('  ', ' ').strip()
+    for name, xpath in fields.items():
 
+        if isinstance(xpath, tuple):
+            text = get_tag_text(tree, xpath[0], _separator=xpath[1])
 
-def cleanup_text(text):
-    """This function removes any extra line spaces and characters from the provided text.
+            if len(xpath) > 2 and xpath[2] is not None:
+                text = xpath[2](text)
+
+            values[name] = text
+        else:
+            values[name] = get_tag_text(tree, xpath)
+
+    return values
+
+
+def normalize_whitespace(text, _escaped_newlines=False):
+    """This function removes carriage returns, turns line breaks into spaces and collapses runs of spaces
+    in linear time, whatever the length of the runs.
 
     Args:
-        text (str): The plain text that needs to be cleaned
+        text (str): The plain text that needs to be normalised
+        _escaped_newlines (bool): If True then the two characters \\n are treated as a line break as well
 
     Returns:
-        new_text (str): The cleaned text
+        new_text (str): The normalised text
     """
     new_text = text
 
-    while True:
+    # Every pass is guarded by a scan, which is much cheaper than a replace that finds nothing to replace.
+    if '\r' in new_text:
+        new_text = new_text.replace('\r', '')
+
+    if '\n' in new_text:
+        new_text = new_text.replace('\n', ' ')
 
-        if '\r' in new_text:
-            new_text = new_text.replace('\r', '').strip()
+    if _escaped_newlines and '\\n' in new_text:
+        new_text = new_text.replace('\\n', ' ')
 
-        if '\n' in new_text:
-            new_text = new_text.replace('\n', ' ').strip()
+    # Stripping first drops a text made only of whitespace before any collapsing.
+    new_text = new_text.strip()
+
+    # Each replace halves the runs of spaces, like the old loop, runs still left after two of them are collapsed
+    # by one regex pass instead, so a long run costs linear time.
+    if '  ' in new_text:
+        new_text = new_text.replace('  ', ' ')
 
         if '  ' in new_text:
-            new_text = new_text.replace('  ', ' ').strip()
+            new_text = new_text.replace('  ', ' ')
+
+            if '  ' in new_text:
+                new_text = _spaces_pattern.sub(' ', new_text)
+
+    return new_text
+
+
+def normalize_whitespace_batch(texts, _escaped_newlines=False):
+    """This function normalises a list of texts the same way as normalize_whitespace.
+
+    The texts are joined and normalised together, so every pass runs once over the whole list
+    instead of once per text.
+
+    Args:
+        texts (list): The plain texts that need to be normalised
+        _escaped_newlines (bool): If True then the two characters \\n are treated as a line break as well
+
+    Returns:
+        new_texts (list): The normalised texts in the same order
+    """
+    joined = '\0'.join(texts)
+
+    # The separator must not be part of the texts, otherwise fall back to normalising them one by one.
+    if joined.count('\0') != len(texts) - 1:
+        return [normalize_whitespace(text, _escaped_newlines) for text in texts]
+
+    return [text.strip() for text in normalize_whitespace(joined, _escaped_newlines).split('\0')]
+
+
+def cleanup_text(text):
+    """This function removes any extra line spaces and characters from the provided text.
+
+    Args:
+        text (str): The plain text that needs to be cleaned
 
-        if '\n' not in new_text and '  ' not in new_text:
-            return new_text
+    Returns:
+        new_text (str): The cleaned text
+    """
+    return normalize_whitespace(text)
 
 
 def save_file_locally(file_path, content, _mode='wb'):
@@ -279,6 +867,47 @@ def save_file_locally(file_path, content, _mode='wb'):
         f.close()
 
 
+def save_chunks_locally(file_path, chunks, _max_size=None):
+    """This function streams the provided chunks into a temporary file and renames it once it is complete.
+
+    Only one chunk is held in memory at a time, and the file appears under its final name atomically,
+    so a half written file is never mistaken for a downloaded one.
+
+    Args:
+        file_path (str): The relative path of the file where it needs to be stored
+        chunks (iterable): The byte chunks of the file, e.g. response.iter_content()
+        _max_size (int): The maximum allowed size of the file in bytes, no limit by default.
+
+    Returns:
+        Status (bool): True if the file is stored successfully, Otherwise False if it exceeds the maximum size
+    """
+    temp_path = f'{file_path}.{get_random_string(8)}.part'
+    size = 0
+
+    try:
+        with open(temp_path, mode='wb') as f:
+
+            for chunk in chunks:
+                size += len(chunk)
+
+                if _max_size is not None and size > _max_size:
+                    f.close()
+                    os.remove(temp_path)
+                    return False
+
+                f.write(chunk)
+
+        os.replace(temp_path, file_path)
+        return True
+
+    except BaseException:
+
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        raise
+
+
 def create_files_dir(files_dir):
     """This function makes sure that the provided file path exists.
 
@@ -328,34 +957,211 @@ def remove_dir_if_empty(dir_name):
 # Below are the Functions related to the AWS files uploading.
 
 
-def upload_files_to_s3_bucket(project_name, aws_filename, dest_dir):
+class StorageBackend:
+    """This class is the interface of the remote storages that files are uploaded to.
+
+    A backend only needs to implement upload_file, so the uploader can be pointed at the AWS S3 bucket,
+    an S3 compatible server or a local directory without any other change.
+    """
+
+    def upload_file(self, local_path, remote_path):
+        """This function uploads a single file.
+
+        Args:
+            local_path (str): The relative path of the local file.
+            remote_path (str): The path of the file relative to the root of the storage, e.g. project/file.jpg
+        """
+        raise NotImplementedError
+
+
+class S3StorageBackend(StorageBackend):
+    """This class uploads files to the AWS S3 bucket (or an S3 compatible server) through boto3.
+
+    Files larger than the multipart threshold are uploaded in parts concurrently by boto3.
+
+    Args:
+        _bucket_path (str): The s3://bucket/prefix path that files are uploaded under, s3_bucket_path by default.
+        _endpoint_url (str): The URL of an S3 compatible server, the AWS endpoint is used by default.
+        _multipart_threshold (int): The size in bytes from which files are uploaded in parts.
+        _multipart_chunksize (int): The size in bytes of every part.
+        _client (S3.Client): An already configured boto3 client.
+    """
+
+    def __init__(self, _bucket_path=None, _endpoint_url=None, _multipart_threshold=8 * 1024 * 1024,
+                 _multipart_chunksize=8 * 1024 * 1024, _client=None):
+
+        if boto3 is None:
+            raise ImportError('The boto3 module is required for uploading files to the S3 bucket.')
+
+        bucket_path = urlparse(_bucket_path or s3_bucket_path)
+
+        self.bucket = bucket_path.netloc
+        self.prefix = bucket_path.path.strip('/')
+
+        self._client = _client or boto3.client('s3', endpoint_url=_endpoint_url)
+        self._transfer_config = boto3.s3.transfer.TransferConfig(multipart_threshold=_multipart_threshold,
+                                                                 multipart_chunksize=_multipart_chunksize)
+
+    def upload_file(self, local_path, remote_path):
+        key = f'{self.prefix}/{remote_path}' if self.prefix else remote_path
+
+        self._client.upload_file(local_path, self.bucket, key, Config=self._transfer_config)
+
+
+class LocalStorageBackend(StorageBackend):
+    """This class copies files into a local directory, it stands in for the S3 bucket in tests and dry runs.
+
+    Args:
+        root_dir (str): The relative path of the local directory that acts as the bucket.
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    def upload_file(self, local_path, remote_path):
+        file_path = f'{self.root_dir}/{remote_path}'
+
+        create_files_dir(os.path.dirname(file_path))
+        shutil.copyfile(local_path, file_path)
+
+
+def _upload_file_item(backend, local_path, remote_path, _retries=1):
+    """This function uploads a single file, retrying it up to _retries attempts, and returns its size.
+
+    Raises:
+        Exception: The error of the last attempt if every attempt failed.
+    """
+    file_size = os.path.getsize(local_path)
+
+    for attempt in range(1, _retries + 1):
+
+        try:
+            backend.upload_file(local_path, remote_path)
+            return file_size
+        except Exception:
+
+            if attempt == _retries:
+                raise
+
+
+def upload_files_natively(project_name, aws_filename, dest_dir, _backend=None, _workers=8, _ledger=None, _retries=2):
+    """This function uploads the files from destination folder through a storage backend using a pool of threads.
+
+    A row is written to the AWS CSV file (and the ledger) as soon as each file is uploaded, and the file is removed
+    locally. Files that fail to upload are reported and left in the destination folder.
+
+    Args:
+        project_name (str): The name of the project that represents remote directory on the AWS S3 bucket.
+        aws_filename (str): The relative path to the CSV file containing logs of uploaded files on to the AWS S3 bucket.
+        dest_dir (str): The relative path of the local directory where files are stored temporarily for uploading.
+        _backend (StorageBackend): The storage to upload to, S3StorageBackend by default.
+        _workers (int): The number of files uploaded at the same time.
+        _ledger (UploadLedger): If provided then the uploaded files are recorded in the ledger as well.
+        _retries (int): The number of attempts for every file before it is counted as failed.
+
+    Returns:
+        counts (tuple): The number of uploaded files and the number of failed files.
+    """
+    backend = _backend or S3StorageBackend()
+
+    uploaded = 0
+    failed = 0
+
+    def record(done):
+        nonlocal uploaded, failed
+
+        for future in done:
+            local_path, remote_path = futures.pop(future)
+
+            try:
+                file_size = future.result()
+            except Exception as e:
+                print(f'\nUpload Error: "{local_path}" failed with {e!r}')
+                failed += 1
+                continue
+
+            s3_path = f'/{remote_path}'
+            time_stamp = datetime.now()
+
+            aws_writer.writerow([s3_path, file_size, time_stamp])
+
+            if _ledger is not None:
+                _ledger.add(s3_path, file_size, time_stamp)
+
+            os.remove(local_path)
+            uploaded += 1
+
+        write_to_console(f'Uploaded Files: {uploaded} | Failed: {failed}')
+
+    with get_csv_writer(aws_filename, 'a', _buffer_rows=1) as aws_writer, \
+            ThreadPoolExecutor(max_workers=_workers) as pool:
+        futures = {}
+
+        for local_path in get_recursive_filepaths(dest_dir):
+            remote_path = f'{project_name}/{Path(os.path.relpath(local_path, dest_dir)).as_posix()}'
+
+            futures[pool.submit(_upload_file_item, backend, local_path, remote_path, _retries)] = \
+                (local_path, remote_path)
+
+            # Keep a bounded number of files in flight, like download_files.
+            if len(futures) >= _workers * 4:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                record(done)
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            record(done)
+
+    return uploaded, failed
+
+
+def upload_files_to_s3_bucket(project_name, aws_filename, dest_dir, _ledger=None, _backend=None):
     """This function uploads the files from destination folder to remote folder on the AWS S3 bucket.
 
     Args:
         project_name (str): The name of the project that represents remote directory on the AWS S3 bucket.
         aws_filename (str): The relative path to the CSV file containing logs of uploaded files on to the AWS S3 bucket.
         dest_dir (str): The relative path of the local directory where files are stored temporarily for uploading.
+        _ledger (UploadLedger): If provided then the uploaded files are recorded in the ledger as well.
+        _backend (StorageBackend): The storage to upload to, by default boto3 is used if installed, Otherwise the AWS CLI.
+
+    Files that still fail to upload are moved to <dest_dir>_failed, upload_files_to_aws moves them back into
+    the source directory so they are uploaded again with the next batch.
     """
 
+    if _backend is not None or boto3 is not None:
+        upload_files_natively(project_name, aws_filename, dest_dir, _backend=_backend, _ledger=_ledger)
+
+        # Keep the files that failed to upload aside, so they are not lost and the next batch is not blocked.
+        for local_path in get_recursive_filepaths(dest_dir):
+            failed_path = f'{dest_dir}_failed/{os.path.relpath(local_path, dest_dir)}'
+
+            create_files_dir(os.path.dirname(failed_path))
+            shutil.move(local_path, failed_path)
+
+        shutil.rmtree(dest_dir, ignore_errors=True)
+        return
+
     s3_project_path = f'{s3_bucket_path}/{project_name}/'
     command = ['aws', 's3', 'cp', dest_dir, s3_project_path, '--recursive']
 
     result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
 
-    aws_writer = get_csv_writer(aws_filename, 'a')
+    with get_csv_writer(aws_filename, 'a') as aws_writer:
 
-    for line in str(result.stdout).split('\n'):
+        for line in str(result.stdout).split('\n'):
 
-        if 'upload:' in line:
-            local_path = line.split(' to ')[0].replace('upload: ', '').strip()
+            if 'upload:' in line:
+                local_path = line.split(' to ')[0].replace('upload: ', '').strip()
 
-            s3_path = line.split(' to ')[-1].replace(s3_bucket_path, '').strip()
-            file_size = str(os.path.getsize(local_path))
-            time_stamp = datetime.now()
+                s3_path = line.split(' to ')[-1].replace(s3_bucket_path, '').strip()
+                file_size = str(os.path.getsize(local_path))
+                time_stamp = datetime.now()
 
-            aws_writer.writerow([s3_path, file_size, time_stamp])
+                aws_writer.writerow([s3_path, file_size, time_stamp])
 
-    get_csv_writer(aws_filename, 'a')
+                if _ledger is not None:
+                    _ledger.add(s3_path, file_size, time_stamp)
 
     # Remove the temporary directory holding all the files after uploading to the AWS S3 bucket.
     shutil.rmtree(dest_dir, ignore_errors=True)
@@ -363,69 +1169,305 @@ def upload_files_to_s3_bucket(project_name, aws_filename, dest_dir):
 
 def wait_while_files_are_uploading(dest_dir):
 
-    # Make sure that files of previous batch were uploaded before starting to upload a new batch.
-    while not remove_dir_if_empty(dest_dir):
+    # Make sure that the thread of the previous batch finished before starting to upload a new batch,
+    # the directory is emptied file by file while the thread still has to record and clean up.
+    previous = _upload_threads.pop(dest_dir, None)
+
+    while previous is not None and previous.is_alive():
         write_to_console('Uploading the files to AWS...')
-        sleep(0.5)
+        previous.join(0.5)
+
+
+def restore_failed_uploads(dest_dir, src_dir):
+    """This function moves the files that were not uploaded by a previous batch back into the source directory,
+    i.e. the files moved to <dest_dir>_failed and the files left in the destination folder by a crashed run.
+
+    Args:
+        dest_dir (str): The relative path of the local directory where files are stored temporarily for uploading.
+        src_dir (str): The relative path of the local directory where files are being downloaded.
+
+    Returns:
+        count (int): The number of files moved back.
+    """
+    count = 0
+
+    for leftover_dir in (f'{dest_dir}_failed', dest_dir):
+
+        if not os.path.isdir(leftover_dir):
+            continue
+
+        for local_path in get_recursive_filepaths(leftover_dir):
+            src_path = f'{src_dir}/{os.path.relpath(local_path, leftover_dir)}'
+
+            create_files_dir(os.path.dirname(src_path))
+            shutil.move(local_path, src_path)
+            count += 1
+
+        shutil.rmtree(leftover_dir, ignore_errors=True)
+
+    return count
+
+
+def get_upload_pipeline(project_name, aws_filename, _ledger=None):
+    """This function returns the upload pipeline shared by every call of upload_files_to_aws for the same
+    project and AWS CSV file, it is created on the first call.
+
+    Returns:
+        pipeline (UploadPipeline): The pipeline uploading the files of the project.
+    """
+    key = (project_name, aws_filename)
+
+    with _upload_pipelines_lock:
+
+        if key not in _upload_pipelines:
+            _upload_pipelines[key] = UploadPipeline(project_name, aws_filename, _ledger=_ledger)
 
+        return _upload_pipelines[key]
 
-def upload_files_to_aws(project_name, aws_filename, src_dir, dest_dir):
-    """This function runs a thread to start uploading the files to AWS S3 bucket.
+
+def upload_files_to_aws(project_name, aws_filename, src_dir, dest_dir, _ledger=None):
+    """This function starts uploading the downloaded files to AWS S3 bucket in the background.
+
+    If boto3 is installed then every file of the source directory is queued on the shared UploadPipeline and
+    uploaded in place, so the call only blocks while the queue is full, and a file that fails is queued again
+    on the next call. Otherwise the source directory is swapped into the destination folder, which is uploaded
+    with the AWS CLI by a thread once the previous batch is done. Either way the uploads are finished before
+    the interpreter exits.
 
     Args:
         project_name (str): The name of the project that represents remote directory on the AWS S3 bucket.
         aws_filename (str): The relative path to the CSV file containing logs of uploaded files on to the AWS S3 bucket.
         src_dir (str): The relative path of the local directory where files are being downloaded.
         dest_dir (str): The relative path of the local directory where files are stored temporarily for uploading.
+        _ledger (UploadLedger): If provided then the uploaded files are recorded in the ledger as well.
     """
 
     wait_while_files_are_uploading(dest_dir)
+    restore_failed_uploads(dest_dir, src_dir)
+
+    if boto3 is not None:
+        pipeline = get_upload_pipeline(project_name, aws_filename, _ledger=_ledger)
+
+        for local_path in get_recursive_filepaths(src_dir):
+
+            if not local_path.endswith('.part'):
+                pipeline.put(local_path, f'{project_name}/{Path(os.path.relpath(local_path, src_dir)).as_posix()}')
+
+        return
 
     os.replace(src_dir, dest_dir)
     os.mkdir(src_dir)
 
-    t = Thread(target=upload_files_to_s3_bucket, args=(project_name, aws_filename, dest_dir,))
-    t.daemon = True
+    # The thread is not a daemon, so the interpreter waits for the batch to be uploaded before exiting.
+    t = Thread(target=upload_files_to_s3_bucket, args=(project_name, aws_filename, dest_dir, _ledger,))
     t.start()
 
+    _upload_threads[dest_dir] = t
 
-def get_urls_of_files_to_upload(records_filename, key_index, value_index):
-    """This function reads the records CSV file to grab URLs of the files that needs to be uploaded on AWS S3 bucket.
 
-    Args:
-        records_filename (str): The relative path to the records CSV file that holds URLs of the files to be downloaded.
-        key_index (int): The index of the column that points to the Unique Identifier Column in the records CSV.
-        value_index (int): The index of the column that points to the URLs of the files in the records CSV.
+class UploadPipeline:
+    """This class uploads every downloaded file as soon as it is queued, while downloading carries on.
 
-    Returns:
-        items (dict): A dictionary holding CARD_IDs as keys and URLs of the files as values.
+    Files are passed through a bounded queue to a pool of (non daemon) uploader threads, so a download loop
+    only blocks when uploads fall behind by more than the queue size. Every upload writes its row to the AWS CSV
+    file (and the ledger) and removes the local file. When the main thread exits without calling close(),
+    the uploaders still drain the queue before the interpreter shuts down.
+
+    Args:
+        project_name (str): The name of the project that represents remote directory on the AWS S3 bucket.
+        aws_filename (str): The relative path to the CSV file containing logs of uploaded files on to the AWS S3 bucket.
+        _backend (StorageBackend): The storage to upload to, S3StorageBackend by default.
+        _workers (int): The number of files uploaded at the same time.
+        _queue_size (int): The maximum number of files waiting to be uploaded.
+        _ledger (UploadLedger): If provided then the uploaded files are recorded in the ledger as well.
+        _retries (int): The number of attempts for every file before it is counted as failed.
     """
-    items = {}
 
-    reader = csv.reader(open(records_filename, 'r', errors='ignore', encoding='utf-8'),
-                        delimiter=',',
-                        lineterminator='\n')
-    next(reader)  # Skip header row
+    def __init__(self, project_name, aws_filename, _backend=None, _workers=8, _queue_size=1000, _ledger=None,
+                 _retries=2):
+        self.project_name = project_name
+        self.backend = _backend or S3StorageBackend()
+        self.ledger = _ledger
+        self.retries = _retries
+
+        self.uploaded = 0
+        self.failed = []
+
+        self._queued = set()
+        self._queue = Queue(maxsize=_queue_size)
+        self._lock = Lock()
+        self._closed = False
+
+        self._aws_writer = get_csv_writer(aws_filename, 'a', _buffer_rows=1)
+
+        self._threads = [Thread(target=self._upload_files, name=f'UploadPipeline-{i}') for i in range(_workers)]
+
+        for t in self._threads:
+            t.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def put(self, local_path, _remote_path=None):
+        """This function queues a downloaded file for uploading, it blocks while the queue is full.
+
+        A file that is still queued or being uploaded is not queued again.
+
+        Args:
+            local_path (str): The relative path of the downloaded file.
+            _remote_path (str): The path of the file relative to the root of the storage, project/filename by default.
+        """
+        if self._closed:
+            raise ValueError('The upload pipeline is already closed.')
+
+        with self._lock:
+
+            if local_path in self._queued:
+                return
+
+            self._queued.add(local_path)
+
+        self._queue.put((local_path, _remote_path or f'{self.project_name}/{Path(local_path).name}'))
+
+    def flush(self):
+        """This function waits until every queued file is uploaded (or failed)."""
+        self._queue.join()
+
+    def close(self):
+        """This function uploads the remaining files, stops the uploader threads and closes the AWS CSV file."""
+
+        if self._closed:
+            return
+
+        self._closed = True
+
+        for _ in self._threads:
+            self._queue.put(None)
+
+        for t in self._threads:
+            t.join()
+
+        self._aws_writer.close()
+
+        print(f'\nUploaded Files: {self.uploaded} | Failed: {len(self.failed)}')
+
+    def _upload_files(self):
+
+        while True:
+
+            try:
+                item = self._queue.get(timeout=0.5)
+            except Empty:
+
+                # The main thread has finished without closing the pipeline, the queue is drained by now.
+                if not main_thread().is_alive():
+                    return
+
+                continue
+
+            try:
+                if item is None:
+                    return
+
+                self._upload_file(*item)
+            finally:
+
+                if item is not None:
+
+                    with self._lock:
+                        self._queued.discard(item[0])
+
+                self._queue.task_done()
+
+    def _upload_file(self, local_path, remote_path):
+
+        try:
+            file_size = _upload_file_item(self.backend, local_path, remote_path, self.retries)
+        except Exception as e:
+            print(f'\nUpload Error: "{local_path}" failed with {e!r}')
+
+            with self._lock:
+                self.failed.append(local_path)
+
+            return
 
-    for line in reader:
+        s3_path = f'/{remote_path}'
+        time_stamp = datetime.now()
+
+        self._aws_writer.writerow([s3_path, file_size, time_stamp])
+
+        with self._lock:
+            self.uploaded += 1
+
+        if self.ledger is not None:
+            self.ledger.add(s3_path, file_size, time_stamp)
+
+        os.remove(local_path)
+
+
+def _iter_urls_of_files_to_upload(lines, key_index, value_index):
+    """This function yields the (CARD_ID, row) pairs of the lines having a file URL."""
+
+    for line in lines:
 
         if line:
             card_id = line[key_index].lower().strip()
             file_url = line[value_index].strip()
 
             if file_url:
-                items[card_id] = line
+                yield card_id, line
+
+
+def iter_urls_of_files_to_upload(records_filename, key_index, value_index, _chunk_size=None):
+    """This function streams the records CSV file to grab URLs of the files that needs to be uploaded on AWS S3 bucket.
+
+    Args:
+        records_filename (str): The relative path to the records CSV file that holds URLs of the files to be downloaded.
+        key_index (int): The index of the column that points to the Unique Identifier Column in the records CSV.
+        value_index (int): The index of the column that points to the URLs of the files in the records CSV.
+        _chunk_size (int): If provided then lists of up to this many items are yielded instead of single items.
+
+    Yields:
+        item (tuple): Every (CARD_ID, row) pair having a file URL, or a list of pairs when _chunk_size is provided
+    """
+    if not _chunk_size:
+        yield from _iter_urls_of_files_to_upload(iter_csv_rows(records_filename), key_index, value_index)
+        return
+
+    for chunk in iter_csv_rows(records_filename, _chunk_size=_chunk_size):
+        items = list(_iter_urls_of_files_to_upload(chunk, key_index, value_index))
+
+        if items:
+            yield items
+
+
+def get_urls_of_files_to_upload(records_filename, key_index, value_index):
+    """This function reads the records CSV file to grab URLs of the files that needs to be uploaded on AWS S3 bucket.
+
+    Args:
+        records_filename (str): The relative path to the records CSV file that holds URLs of the files to be downloaded.
+        key_index (int): The index of the column that points to the Unique Identifier Column in the records CSV.
+        value_index (int): The index of the column that points to the URLs of the files in the records CSV.
+
+    Returns:
+        items (dict): A dictionary holding CARD_IDs as keys and URLs of the files as values.
+    """
+    items = dict(iter_urls_of_files_to_upload(records_filename, key_index, value_index))
 
     print(f'Total Files to Upload: {len(items)}')
     return items
 
 
-def skip_already_uploaded_files(items, aws_filename):
+def skip_already_uploaded_files(items, aws_filename, _ledger=None):
     """This function removes the CARD_IDs of the already uploaded files from the provided dictionary.
 
     Args:
         items (dict): A dictionary holding CARD_IDs as keys and URLs of the files as values.
         aws_filename (str): The relative path to the CSV file containing logs of uploaded files on to the AWS S3 bucket.
+        _ledger (UploadLedger): If provided then the ledger is looked up instead of reading the AWS CSV file.
 
     Raises:
         KeyError: If the CARD_ID is not present in the dictionary.
@@ -433,25 +1475,32 @@ def skip_already_uploaded_files(items, aws_filename):
     counter = 0
     uploaded = 0
 
+    if _ledger is not None:
+        uploaded = _ledger.skip_uploaded(items)
+
+        print(f'Uploaded Files: {uploaded}/{len(_ledger)} | Remaining: {len(items)}')
+        return
+
     if os.path.exists(aws_filename):
-        uploaded_files = open(aws_filename, 'r').read().split('\n')
 
-        for row in uploaded_files[1:]:
+        with open(aws_filename, 'r', errors='ignore', encoding='utf-8') as f:
+            uploaded_files = csv.reader(f, delimiter=',', lineterminator='\n')
+            next(uploaded_files, None)  # Skip header row
 
-            if not row:
-                continue
+            for cols in uploaded_files:
 
-            cols = row.split(',')
+                if not cols:
+                    continue
 
-            file_key = Path(cols[0]).stem
+                file_key = Path(cols[0]).stem
 
-            counter += 1
+                counter += 1
 
-            try:
-                del items[file_key]
-                uploaded += 1
-            except KeyError:
-                continue
+                try:
+                    del items[file_key]
+                    uploaded += 1
+                except KeyError:
+                    continue
 
     print(f'Uploaded Files: {uploaded}/{counter} | Remaining: {len(items)}')
 
@@ -478,324 +1527,2750 @@ def traverse_files(items, src_dir):
     return count, download_count
 
 
-def skip_already_downloaded_files(items, src_dir):
-    """This function removes the CARD_IDs of the already uploaded files from the provided dictionary.
+class SQLiteKeyIndex:
+    """This class is the base of the persistent, indexed CARD_ID stores kept in SQLite files.
 
-    Args:
-        items (dict): A dictionary holding CARD_IDs as keys and URLs of the files as values.
-        src_dir (str): The relative path of the local directory where files are being downloaded.
+    Every row is keyed by CARD_ID, so a lookup never loads the rest of the history into memory.
 
-    Raises:
-        KeyError: If the CARD_ID is not present in the dictionary.
+    Args:
+        index_filename (str): The relative path to the SQLite file holding the index.
     """
-    counter = 0
-    downloaded = 0
+    table_name = ''
+    columns = ()
 
-    files = glob(src_dir+'/*.jpg')
+    def __init__(self, index_filename):
+        self.index_filename = index_filename
 
-    if files:
-        count, download_count = traverse_files(items, src_dir)
+        self._lock = Lock()
+        self._connection = sqlite3.connect(index_filename, check_same_thread=False)
 
-        counter += count
-        downloaded += download_count
-    else:
-        dirs = glob(src_dir+'/*')
+        columns = ''.join(f', {column} TEXT' for column in self.columns)
 
-        if dirs:
+        with self._lock:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute(f'CREATE TABLE IF NOT EXISTS {self.table_name} '
+                                     f'(card_id TEXT PRIMARY KEY{columns})')
+            self._connection.commit()
 
-            for _dir in dirs:
-                files = glob(_dir + '/*.jpg')
+    def __enter__(self):
+        return self
 
-                if files:
-                    count, download_count = traverse_files(items, _dir)
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
-                    counter += count
-                    downloaded += download_count
+    def __contains__(self, card_id):
+        with self._lock:
+            row = self._connection.execute(f'SELECT 1 FROM {self.table_name} WHERE card_id = ?',
+                                           (card_id,)).fetchone()
 
-    print(f'Downloaded Files: {downloaded}/{counter} | Remaining: {len(items)}')
+        return row is not None
 
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(f'SELECT COUNT(*) FROM {self.table_name}').fetchone()[0]
 
-def get_urls_to_upload_after_configurations(records_filename, aws_filename, src_dir, key_index, value_index):
-    """This function prepares the Environment for files uploading and specify remaining files that are not uploaded yet.
+    def _insert_rows(self, rows):
+        placeholders = ', '.join('?' * (len(self.columns) + 1))
 
-    Args:
-        records_filename (str): The relative path to the records CSV file that holds URLs of the files to be downloaded.
-        aws_filename (str): The relative path to the CSV file containing logs of uploaded files on to the AWS S3 bucket.
-        src_dir (str): The relative path of the local directory where files are being downloaded.
-        key_index (int): The index of the column that points to the Unique Identifier Column in the records CSV.
-        value_index (int): The index of the column that points to the URLs of the files in the records CSV.
+        with self._lock:
+            self._connection.executemany(f'INSERT OR REPLACE INTO {self.table_name} VALUES ({placeholders})', rows)
+            self._connection.commit()
 
-    Returns:
-        items (dict): A dictionary holding CARD_IDs as keys and URLs of the files as values.
-    """
-    if not os.path.isdir(src_dir):
-        os.mkdir(src_dir)
+    def skip_present(self, items, _batch_size=500):
+        """This function removes the CARD_IDs that are present in the index from the provided dictionary.
 
-    if not os.path.exists(aws_filename):
-        aws_writer = get_csv_writer(aws_filename)
-        aws_writer.writerow(['S3 Path', 'File Size', 'Timestamp'])
+        Args:
+            items (dict): A dictionary holding CARD_IDs as keys and URLs of the files as values.
+            _batch_size (int): The number of CARD_IDs looked up per query.
 
-    get_csv_writer(aws_filename, 'a')
+        Returns:
+            count (int): The number of CARD_IDs removed from the dictionary.
+        """
+        count = 0
+        card_ids = list(items)
 
-    items = get_urls_of_files_to_upload(records_filename, key_index=key_index, value_index=value_index)
+        for index in range(0, len(card_ids), _batch_size):
+            batch = card_ids[index:index + _batch_size]
+            placeholders = ', '.join('?' * len(batch))
 
-    skip_already_uploaded_files(items, aws_filename)
-    skip_already_downloaded_files(items, src_dir)
+            with self._lock:
+                rows = self._connection.execute(f'SELECT card_id FROM {self.table_name} '
+                                                f'WHERE card_id IN ({placeholders})', batch).fetchall()
 
-    return items
+            for (card_id,) in rows:
+                del items[card_id]
+                count += 1
 
+        return count
 
-# Below are the Functions related to the Backend that use Requests module.
+    def close(self):
+        with self._lock:
+            self._connection.close()
 
 
-def get_tree(page_url, retries=2, _verify=True, _timeout=15):
+class DownloadManifest(SQLiteKeyIndex):
+    """This class keeps a persistent record of completely downloaded files in an indexed SQLite table.
 
-    while True:
+    Rows are written as each file lands, so resuming a job is an indexed lookup of the remaining CARD_IDs
+    instead of a glob over the source directory.
 
-        try:
-            response = requests.get(page_url, verify=_verify, timeout=_timeout)
+    Args:
+        index_filename (str): The relative path to the SQLite file holding the manifest.
+    """
+    table_name = 'downloads'
+    columns = ('file_path', 'file_size', 'timestamp')
 
-            if response.status_code == 200:
-                return html.fromstring(response.content)
-            elif response.status_code == 404:
-                return False
-            else:
-                raise Exception
+    def add(self, card_id, file_path):
+        """This function records that the file of the CARD_ID is completely downloaded.
 
-        except Exception as e:
+        Args:
+            card_id (str): The Unique Identifier of the file.
+            file_path (str): The relative path of the downloaded file.
+        """
+        self.add_many([(card_id, file_path)])
 
-            if '[Errno 11001] getaddrinfo failed' in str(e):
-                write_to_console('Internet Connection Error! Retrying...')
-            else:
-                retries -= 1
+    def add_many(self, files):
+        """This function records a batch of completely downloaded files in a single transaction.
 
-            if retries == 0:
-                return False
+        Args:
+            files (iterable): The (CARD_ID, File Path) pairs of the downloaded files.
+        """
+        rows = []
+
+        for card_id, file_path in files:
+
+            try:
+                file_size = os.path.getsize(file_path)
+            except OSError:
+                file_size = 0
+
+            rows.append((card_id, file_path, str(file_size), str(datetime.now())))
+
+        self._insert_rows(rows)
+
+    def skip_downloaded(self, items, _batch_size=500):
+        """This function removes the CARD_IDs of the downloaded files from the provided dictionary.
+
+        Returns:
+            downloaded (int): The number of CARD_IDs removed from the dictionary.
+        """
+        return self.skip_present(items, _batch_size=_batch_size)
+
+    def rebuild(self, src_dir):
+        """This function records every file found in the source directory and its direct subdirectories.
+
+        It is only needed when the manifest is lost or files were downloaded without it,
+        partially downloaded .part files are ignored.
+
+        Args:
+            src_dir (str): The relative path of the local directory where files are being downloaded.
+
+        Returns:
+            count (int): The number of files recorded in the manifest.
+        """
+        count = 0
+        files = []
+        dirs = [src_dir]
+
+        for _dir in dirs:
+
+            try:
+                entries = os.scandir(_dir)
+            except FileNotFoundError:
+                continue
+
+            with entries:
+
+                for entry in entries:
+
+                    if entry.is_dir() and _dir == src_dir:
+                        dirs.append(entry.path)
+                    elif entry.is_file() and not entry.name.endswith('.part'):
+                        files.append((Path(entry.name).stem, entry.path))
+
+                    if len(files) >= 10000:
+                        self.add_many(files)
+                        count += len(files)
+                        files = []
+
+        self.add_many(files)
+        count += len(files)
+
+        print(f'Download Manifest Rebuilt: {count} files | {self.index_filename}')
+        return count
+
+
+def get_download_manifest(src_dir, _rebuild=False):
+    """This function opens the download manifest kept next to the source directory.
+
+    Args:
+        src_dir (str): The relative path of the local directory where files are being downloaded.
+        _rebuild (bool): If True then the manifest is refilled by scanning the source directory.
+
+    Returns:
+        manifest (DownloadManifest): The manifest object of the source directory.
+    """
+    manifest = DownloadManifest(f'{src_dir.rstrip("/")}_downloads.sqlite')
+
+    if _rebuild:
+        manifest.rebuild(src_dir)
+
+    return manifest
+
+
+class UploadLedger(SQLiteKeyIndex):
+    """This class keeps the log of files uploaded on to the AWS S3 bucket in an indexed SQLite table.
+
+    It mirrors the rows of the AWS CSV file (S3 Path, File Size, Timestamp) keyed by the CARD_ID,
+    so checking whether a CARD_ID is uploaded does not read the whole history.
+
+    Args:
+        index_filename (str): The relative path to the SQLite file holding the ledger.
+    """
+    table_name = 'uploads'
+    columns = ('s3_path', 'file_size', 'timestamp')
+
+    def __init__(self, index_filename):
+        super().__init__(index_filename)
+
+        with self._lock:
+            self._connection.execute(f'CREATE TABLE IF NOT EXISTS {self.table_name}_meta '
+                                     f'(name TEXT PRIMARY KEY, value TEXT)')
+            self._connection.commit()
+
+    def get_imported_offset(self):
+        """This function returns the byte offset of the AWS CSV file up to which its rows are in the ledger."""
+
+        with self._lock:
+            row = self._connection.execute(f'SELECT value FROM {self.table_name}_meta WHERE name = ?',
+                                           ('csv_offset',)).fetchone()
+
+        return int(row[0]) if row else 0
+
+    def add(self, s3_path, file_size, time_stamp):
+        """This function records an uploaded file, the arguments are the columns of the AWS CSV file."""
+        self.add_many([(s3_path, file_size, time_stamp)])
+
+    def add_many(self, rows):
+        """This function records a batch of rows of the AWS CSV file in a single transaction.
+
+        Args:
+            rows (iterable): The [S3 Path, File Size, Timestamp] rows of the uploaded files.
+        """
+        self._insert_rows([(Path(row[0]).stem, row[0], str(row[1]), str(row[2])) for row in rows])
+
+    def import_csv(self, aws_filename, _batch_size=10000):
+        """This function imports the rows of the AWS CSV file appended since the last import into the ledger.
+
+        Every batch is committed together with the byte offset of the end of its last line, so an interrupted
+        import carries on from there on the next run, and a partly written last line is left for the next import.
+        If the AWS CSV file is shorter than the stored offset, it was replaced and is imported from the start.
+        Rows are keyed by CARD_ID, so importing them again is harmless.
+
+        Args:
+            aws_filename (str): The relative path to the CSV file containing logs of uploaded files on to the AWS S3 bucket.
+            _batch_size (int): The number of rows inserted per transaction.
+
+        Returns:
+            count (int): The number of imported rows.
+        """
+        offset = self.get_imported_offset()
+
+        if offset > os.path.getsize(aws_filename):
+            offset = 0
+
+        count = 0
+        rows = []
+
+        with open(aws_filename, 'rb') as f:
+            f.seek(offset)
+
+            if offset == 0:
+                header = f.readline()  # Skip header row
+
+                if header.endswith(b'\n'):
+                    offset = f.tell()
+
+            for line in iter(f.readline, b''):
+
+                if not line.endswith(b'\n'):
+                    break
+
+                offset += len(line)
+
+                for row in csv.reader([line.decode('utf-8', errors='ignore')], delimiter=',', lineterminator='\n'):
+
+                    if row and row[0]:
+                        rows.append((row + ['', ''])[:3])
+
+                if len(rows) >= _batch_size:
+                    self._import_rows(rows, offset)
+                    count += len(rows)
+                    rows = []
+
+        self._import_rows(rows, offset)
+        count += len(rows)
+
+        if count:
+            print(f'Upload Ledger Imported: {count} rows | {aws_filename}')
+
+        return count
+
+    def _import_rows(self, rows, offset):
+        placeholders = ', '.join('?' * (len(self.columns) + 1))
+
+        with self._lock:
+            self._connection.executemany(f'INSERT OR REPLACE INTO {self.table_name} VALUES ({placeholders})',
+                                         [(Path(row[0]).stem, row[0], str(row[1]), str(row[2])) for row in rows])
+            self._connection.execute(f'INSERT OR REPLACE INTO {self.table_name}_meta VALUES (?, ?)',
+                                     ('csv_offset', str(offset)))
+            self._connection.commit()
+
+    def skip_uploaded(self, items, _batch_size=500):
+        """This function removes the CARD_IDs of the uploaded files from the provided dictionary.
+
+        Returns:
+            uploaded (int): The number of CARD_IDs removed from the dictionary.
+        """
+        return self.skip_present(items, _batch_size=_batch_size)
+
+
+def get_upload_ledger(aws_filename):
+    """This function opens the upload ledger kept next to the AWS CSV file.
+
+    The rows appended to the AWS CSV file since the last import (by the AWS CLI or another process) are imported
+    first, so the ledger never misses an upload recorded only in the CSV file.
+
+    Args:
+        aws_filename (str): The relative path to the CSV file containing logs of uploaded files on to the AWS S3 bucket.
+
+    Returns:
+        ledger (UploadLedger): The ledger object of the AWS CSV file.
+    """
+    ledger_filename = str(Path(aws_filename).with_suffix('.sqlite'))
+
+    ledger = UploadLedger(ledger_filename)
+
+    if os.path.exists(aws_filename):
+        ledger.import_csv(aws_filename)
+
+    return ledger
+
+
+def skip_already_downloaded_files(items, src_dir, _manifest=None):
+    """This function removes the CARD_IDs of the already uploaded files from the provided dictionary.
+
+    Args:
+        items (dict): A dictionary holding CARD_IDs as keys and URLs of the files as values.
+        src_dir (str): The relative path of the local directory where files are being downloaded.
+        _manifest (DownloadManifest): If provided then the manifest is looked up instead of globbing the directory.
+
+    Raises:
+        KeyError: If the CARD_ID is not present in the dictionary.
+    """
+    counter = 0
+    downloaded = 0
+
+    if _manifest is not None:
+        downloaded = _manifest.skip_downloaded(items)
+
+        print(f'Downloaded Files: {downloaded}/{len(_manifest)} | Remaining: {len(items)}')
+        return
+
+    files = glob(src_dir+'/*.jpg')
+
+    if files:
+        count, download_count = traverse_files(items, src_dir)
+
+        counter += count
+        downloaded += download_count
+    else:
+        dirs = glob(src_dir+'/*')
+
+        if dirs:
+
+            for _dir in dirs:
+                files = glob(_dir + '/*.jpg')
+
+                if files:
+                    count, download_count = traverse_files(items, _dir)
+
+                    counter += count
+                    downloaded += download_count
+
+    print(f'Downloaded Files: {downloaded}/{counter} | Remaining: {len(items)}')
+
+
+def get_urls_to_upload_after_configurations(records_filename, aws_filename, src_dir, key_index, value_index,
+                                            _manifest=None, _ledger=None):
+    """This function prepares the Environment for files uploading and specify remaining files that are not uploaded yet.
+
+    Args:
+        records_filename (str): The relative path to the records CSV file that holds URLs of the files to be downloaded.
+        aws_filename (str): The relative path to the CSV file containing logs of uploaded files on to the AWS S3 bucket.
+        src_dir (str): The relative path of the local directory where files are being downloaded.
+        key_index (int): The index of the column that points to the Unique Identifier Column in the records CSV.
+        value_index (int): The index of the column that points to the URLs of the files in the records CSV.
+        _manifest (DownloadManifest): If provided then downloaded files are skipped using the manifest.
+        _ledger (UploadLedger): If provided then uploaded files are skipped using the ledger.
+
+    Returns:
+        items (dict): A dictionary holding CARD_IDs as keys and URLs of the files as values.
+    """
+    if not os.path.isdir(src_dir):
+        os.mkdir(src_dir)
+
+    if not os.path.exists(aws_filename):
+
+        with get_csv_writer(aws_filename) as aws_writer:
+            aws_writer.writerow(['S3 Path', 'File Size', 'Timestamp'])
+
+    items = get_urls_of_files_to_upload(records_filename, key_index=key_index, value_index=value_index)
+
+    skip_already_uploaded_files(items, aws_filename, _ledger=_ledger)
+    skip_already_downloaded_files(items, src_dir, _manifest=_manifest)
+
+    return items
+
+
+# Below are the Functions related to the Backend that use Requests module.
+
+
+def create_http_adapter(_pool_connections=None, _pool_maxsize=None, _pool_block=False):
+    """This function creates a transport adapter holding a pool of keep-alive connections.
+
+    Args:
+        _pool_connections (int): The number of hosts for which connection pools are cached.
+        _pool_maxsize (int): The maximum number of connections kept open to a single host.
+        _pool_block (bool): If True then callers wait for a free connection instead of opening an extra one.
+
+    Returns:
+        adapter (HTTPAdapter): The adapter that can be mounted on one or more sessions.
+    """
+    return requests.adapters.HTTPAdapter(pool_connections=_pool_connections or http_pool_connections,
+                                         pool_maxsize=_pool_maxsize or http_pool_maxsize,
+                                         pool_block=_pool_block)
+
+
+def create_session(_adapter=None, _headers=None):
+    """This function creates a session that reuses TCP and TLS connections between requests.
+
+    Args:
+        _adapter (HTTPAdapter): The adapter holding the connection pool, a new one is created if not provided.
+        _headers (dict): The headers that will be sent with every request of this session.
+
+    Returns:
+        session (Session): The session object that can be passed to get_tree and get_file.
+    """
+    session = requests.Session()
+
+    if _adapter is None:
+        _adapter = create_http_adapter()
+
+    session.mount('http://', _adapter)
+    session.mount('https://', _adapter)
+
+    if _headers:
+        session.headers.update(_headers)
+
+    return session
+
+
+def configure_http_pool(pool_connections=10, pool_maxsize=32, _pool_block=False):
+    """This function replaces the shared connection pool used by get_tree and get_file.
+
+    Args:
+        pool_connections (int): The number of hosts for which connection pools are cached.
+        pool_maxsize (int): The maximum number of connections kept open to a single host.
+        _pool_block (bool): If True then callers wait for a free connection instead of opening an extra one.
+    """
+    global _http_adapter, _http_adapter_pid, http_pool_connections, http_pool_maxsize
+
+    with _http_adapter_lock:
+        http_pool_connections = pool_connections
+        http_pool_maxsize = pool_maxsize
+
+        old_adapter = _http_adapter if _http_adapter_pid == os.getpid() else None
+        _http_adapter = create_http_adapter(_pool_block=_pool_block)
+        _http_adapter_pid = os.getpid()
+
+    if old_adapter is not None:
+        old_adapter.close()
+
+
+def get_session():
+    """This function returns the session of the current thread.
+
+    Every thread gets its own session (so cookies are never shared between threads),
+    but all of them are mounted on the same adapter, so keep-alive connections are pooled per host.
+    A forked process gets a new adapter, the sockets inherited from the parent are never used by it.
+
+    Returns:
+        session (Session): The session object of the current thread.
+    """
+    global _http_adapter, _http_adapter_pid
+
+    with _http_adapter_lock:
+        if _http_adapter is None or _http_adapter_pid != os.getpid():
+            _http_adapter = create_http_adapter()
+            _http_adapter_pid = os.getpid()
+
+        adapter = _http_adapter
+
+    session = getattr(_http_sessions, 'session', None)
+
+    if session is None or session.get_adapter('https://') is not adapter:
+        session = create_session(_adapter=adapter)
+        _http_sessions.session = session
+
+    return session
+
+
+def _reset_http_pool_after_fork():
+    """This function gives a forked process its own lock and sessions, the parent may hold them while forking."""
+    global _http_adapter_lock, _http_sessions
+
+    _http_adapter_lock = Lock()
+    _http_sessions = local()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_http_pool_after_fork)
+
+
+class ResponseCache:
+    """This class keeps the fetched pages on disk, so a re-crawl only revalidates them with conditional requests.
+
+    Pages younger than the TTL are served without any request, older ones are revalidated with their
+    ETag / Last-Modified and served from disk when the server answers 304 Not Modified. The least recently
+    used pages are evicted once the total size of the stored pages exceeds the maximum size.
+
+    Args:
+        cache_filename (str): The relative path to the SQLite file holding the cache.
+        _ttl (int): The number of seconds for which a stored page is served without revalidation.
+        _max_size (int): The maximum total size in bytes of the stored pages.
+    """
+
+    def __init__(self, cache_filename, _ttl=24 * 60 * 60, _max_size=1024 * 1024 * 1024):
+        self.cache_filename = cache_filename
+        self.ttl = _ttl
+        self.max_size = _max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+        self._lock = Lock()
+        self._connection = sqlite3.connect(cache_filename, check_same_thread=False)
+
+        with self._lock:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, etag TEXT, '
+                                     'last_modified TEXT, fetched_at REAL, last_used REAL, size INTEGER, body BLOB)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)')
+            self._connection.commit()
+
+            self._size = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, url):
+        """This function looks up the stored page of the URL.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            entry (tuple): The (body, etag, last_modified, is_fresh) of the stored page, Otherwise None
+        """
+        now = time()
+
+        with self._lock:
+            row = self._connection.execute('SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?',
+                                           (url,)).fetchone()
+
+            if row is None:
+                return None
+
+            self._connection.execute('UPDATE responses SET last_used = ? WHERE url = ?', (now, url))
+            self._connection.commit()
+
+        body, etag, last_modified, fetched_at = row
+        is_fresh = now - fetched_at < self.ttl
+
+        if is_fresh:
+            self.hits += 1
+
+        return body, etag, last_modified, is_fresh
+
+    def get_conditional_headers(self, entry):
+        """This function returns the headers that ask the server to answer 304 if the stored page is unchanged."""
+        headers = {}
+
+        if entry is not None:
+            body, etag, last_modified, is_fresh = entry
+
+            if etag:
+                headers['If-None-Match'] = etag
+
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        return headers
+
+    def revalidated(self, url):
+        """This function marks the stored page of the URL as fresh again after a 304 Not Modified."""
+        self.revalidations += 1
+
+        with self._lock:
+            self._connection.execute('UPDATE responses SET fetched_at = ? WHERE url = ?', (time(), url))
+            self._connection.commit()
+
+    def put(self, url, body, _etag=None, _last_modified=None):
+        """This function stores the page of the URL and evicts the least recently used pages if needed.
+
+        Args:
+            url (str): The URL of the page.
+            body (bytes): The content of the page.
+            _etag (str): The ETag header of the response.
+            _last_modified (str): The Last-Modified header of the response.
+        """
+        self.misses += 1
+
+        if len(body) > self.max_size:
+            return
+
+        now = time()
+
+        with self._lock:
+            row = self._connection.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+
+            if row is not None:
+                self._size -= row[0]
+
+            self._connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                     (url, _etag, _last_modified, now, now, len(body), sqlite3.Binary(body)))
+            self._size += len(body)
+
+            if self._size > self.max_size:
+                self._evict()
+
+            self._connection.commit()
+
+    def _evict(self):
+        """This function removes the least recently used pages until the cache is back under 90% of its size."""
+        target_size = self.max_size * 0.9
+
+        rows = self._connection.execute('SELECT url, size FROM responses ORDER BY last_used')
+
+        urls = []
+
+        for url, size in rows:
+
+            if self._size <= target_size:
+                break
+
+            urls.append((url,))
+            self._size -= size
+
+        self._connection.executemany('DELETE FROM responses WHERE url = ?', urls)
+
+    def stats(self):
+        """This function returns the hit / miss counters of the cache.
+
+        Returns:
+            stats (dict): The number of hits, revalidations (304s), misses and the stored size in bytes.
+        """
+        return {'hits': self.hits, 'revalidations': self.revalidations, 'misses': self.misses, 'size': self._size}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class RetryPolicy:
+    """This class decides which failed requests are retried and how long to wait before the next attempt.
+
+    The wait grows exponentially with the attempt number, a random jitter spreads the retries of many workers,
+    and a Retry-After header sent by the server (e.g. with 429 or 503) takes precedence.
+
+    Args:
+        _backoff (float): The number of seconds to wait before the first retry.
+        _max_backoff (float): The maximum number of seconds to wait before any retry.
+        _jitter (bool): If True then the wait is randomised between half and all of the computed backoff.
+        _retry_statuses (tuple): The HTTP status codes that are retried, any other failed status gives up at once.
+        _max_connection_errors (int): The number of connection errors (e.g. getaddrinfo failed) tolerated per request.
+    """
+
+    def __init__(self, _backoff=0.5, _max_backoff=60, _jitter=True, _retry_statuses=(408, 429, 500, 502, 503, 504),
+                 _max_connection_errors=30):
+        self.backoff = _backoff
+        self.max_backoff = _max_backoff
+        self.jitter = _jitter
+        self.retry_statuses = _retry_statuses
+        self.max_connection_errors = _max_connection_errors
+
+    def should_retry(self, status_code):
+        return status_code in self.retry_statuses
+
+    def get_delay(self, attempt, _retry_after=None):
+        """This function returns the number of seconds to wait before the next attempt.
+
+        Args:
+            attempt (int): The number of failed attempts so far, starting from 1.
+            _retry_after (str): The Retry-After header of the failed response, either seconds or an HTTP date.
+
+        Returns:
+            delay (float): The number of seconds to wait.
+        """
+        retry_after = parse_retry_after(_retry_after)
+
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+
+        delay = min(self.backoff * (2 ** (attempt - 1)), self.max_backoff)
+
+        if self.jitter:
+            delay = random.uniform(delay / 2, delay)
+
+        return delay
+
+
+default_retry_policy = RetryPolicy()
+
+
+def parse_retry_after(retry_after):
+    """This function converts the Retry-After header into a number of seconds.
+
+    Args:
+        retry_after (str): The value of the header, either seconds or an HTTP date.
+
+    Returns:
+        seconds (float): The number of seconds to wait, Otherwise None if the header is missing or invalid.
+    """
+    if not retry_after:
+        return None
+
+    retry_after = retry_after.strip()
+
+    if retry_after.isdigit():
+        return float(retry_after)
+
+    try:
+        retry_date = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, retry_date.timestamp() - time())
+
+
+class RateLimiter:
+    """This class is a token bucket per host, it spaces requests out to a sustainable rate for every server.
+
+    Every host can send a burst of requests at once and then refills at the given rate per second.
+    When a server answers 429 the host is paused, so all threads sharing the limiter back off together.
+
+    Args:
+        _rate (float): The number of requests per second allowed to every host.
+        _burst (int): The number of requests that can be sent at once after a host has been idle.
+        _host_rates (dict): The rates of specific hosts (as in the URL, e.g. www.example.com) overriding the default.
+    """
+
+    def __init__(self, _rate=5, _burst=None, _host_rates=None):
+        self.rate = _rate
+        self.burst = _burst or max(1, int(_rate))
+        self.host_rates = _host_rates or {}
+
+        self._buckets = {}
+        self._lock = Lock()
+
+    def reserve(self, url):
+        """This function takes a token of the host of the URL.
+
+        Args:
+            url (str): The URL that is about to be requested.
+
+        Returns:
+            delay (float): The number of seconds to wait before sending the request.
+        """
+        host = urlparse(url).netloc
+        rate = self.host_rates.get(host, self.rate)
+
+        with self._lock:
+            now = monotonic()
+            tokens, updated_at = self._buckets.get(host, (self.burst, now))
+
+            tokens = min(self.burst, tokens + (now - updated_at) * rate) - 1
+            self._buckets[host] = (tokens, now)
+
+        return 0 if tokens >= 0 else -tokens / rate
+
+    def wait(self, url):
+        """This function blocks until a request can be sent to the host of the URL."""
+        delay = self.reserve(url)
+
+        if delay > 0:
+            sleep(delay)
+
+    def pause(self, url, seconds):
+        """This function stops requests to the host of the URL for the given number of seconds."""
+        host = urlparse(url).netloc
+        rate = self.host_rates.get(host, self.rate)
+
+        with self._lock:
+            now = monotonic()
+            tokens, updated_at = self._buckets.get(host, (self.burst, now))
+
+            self._buckets[host] = (min(tokens, 0) - seconds * rate, now)
+
+
+def fetch_with_retries(url, handle, retries=2, _session=None, _retry_policy=None, _rate_limiter=None, _not_found=False,
+                       **kwargs):
+    """This function requests the URL and passes the response to handle, retrying according to the retry policy.
+
+    Args:
+        url (str): The URL to request.
+        handle (function): Called as handle(response) for 200 and 304 responses, its result is returned.
+                           Any exception raised by it counts as a failed attempt.
+        retries (int): The number of attempts before giving up.
+        _session (Session): The session to request with, the shared pooled session is used by default.
+        _retry_policy (RetryPolicy): The policy of the retries, default_retry_policy by default.
+        _rate_limiter (RateLimiter): If provided then every attempt waits for a token of the host.
+        _not_found: The value returned when the URL is not found (404), so it can be told apart from a failure.
+        **kwargs: The arguments passed on to session.get, e.g. timeout, headers or stream.
+
+    Returns:
+        result: The result of handle, Otherwise False if the URL is not found or every attempt failed.
+    """
+    session = _session or get_session()
+    policy = _retry_policy or default_retry_policy
+
+    attempts = 0
+    connection_errors = 0
+
+    while True:
+
+        if _rate_limiter is not None:
+            _rate_limiter.wait(url)
+
+        retry_after = None
+
+        try:
+            with session.get(url, **kwargs) as response:
+
+                if response.status_code in (200, 304):
+                    return handle(response)
+                elif response.status_code == 404:
+                    return _not_found
+                elif not policy.should_retry(response.status_code):
+                    return False
+
+                retry_after = response.headers.get('Retry-After')
+
+                if response.status_code == 429 and _rate_limiter is not None:
+                    _rate_limiter.pause(url, policy.get_delay(attempts + 1, retry_after))
+
+        except Exception as e:
+
+            if '[Errno 11001] getaddrinfo failed' in str(e):
+                write_to_console('Internet Connection Error! Retrying...')
+                connection_errors += 1
+
+                if connection_errors >= policy.max_connection_errors:
+                    return False
+
+                sleep(policy.get_delay(connection_errors))
+                continue
+
+        attempts += 1
+
+        if attempts >= retries:
+            return False
+
+        sleep(policy.get_delay(attempts, retry_after))
+
+
+def get_tree(page_url, retries=2, _verify=True, _timeout=15, _session=None, _cache=None, _retry_policy=None,
+             _rate_limiter=None):
+    """This function fetches the page and parses it into a tree like structure.
+
+    Args:
+        page_url (str): The URL of the page to fetch.
+        retries (int): The number of attempts before giving up.
+        _verify (bool): If False then the TLS certificate of the server is not verified.
+        _timeout (int): The number of seconds to wait for the server to respond.
+        _session (Session): The session to fetch the page with, the shared pooled session is used by default.
+        _cache (ResponseCache): If provided then the page is served from or revalidated against the cache.
+        _retry_policy (RetryPolicy): The policy of the retries, default_retry_policy by default.
+        _rate_limiter (RateLimiter): If provided then every attempt waits for a token of the host.
+
+    Returns:
+        tree (elem): The parsed page if it is fetched successfully, Otherwise False
+    """
+    entry = None
+    headers = {}
+
+    if _cache is not None:
+        entry = _cache.get(page_url)
+
+        if entry is not None and entry[3]:
+            return html.fromstring(entry[0])
+
+        headers = _cache.get_conditional_headers(entry)
+
+    def handle(response):
+
+        if response.status_code == 304:
+
+            if entry is None:
+                raise Exception
+
+            _cache.revalidated(page_url)
+            return html.fromstring(entry[0])
+
+        if _cache is not None:
+            _cache.put(page_url, response.content, _etag=response.headers.get('ETag'),
+                       _last_modified=response.headers.get('Last-Modified'))
+
+        return html.fromstring(response.content)
+
+    return fetch_with_retries(page_url, handle, retries, _session=_session, _retry_policy=_retry_policy,
+                              _rate_limiter=_rate_limiter, verify=_verify, timeout=_timeout, headers=headers)
+
+
+def get_json(api_url, retries=2, _verify=True, _timeout=15, _session=None, _headers=None, _retry_policy=None,
+             _rate_limiter=None):
+    """This function fetches the JSON API endpoint and parses its response.
+
+    Args:
+        api_url (str): The URL of the endpoint to fetch, e.g. one recorded by NetworkRecorder.
+        retries (int): The number of attempts before giving up.
+        _verify (bool): If False then the TLS certificate of the server is not verified.
+        _timeout (int): The number of seconds to wait for the server to respond.
+        _session (Session): The session to fetch with, e.g. from create_session_from_driver, the shared pooled
+                            session is used by default.
+        _headers (dict): The headers of the request, e.g. the request_headers recorded by NetworkRecorder.
+        _retry_policy (RetryPolicy): The policy of the retries, default_retry_policy by default.
+        _rate_limiter (RateLimiter): If provided then every attempt waits for a token of the host.
+
+    Returns:
+        data (dict | list): The parsed JSON if it is fetched successfully, Otherwise False
+    """
+
+    def handle(response):
+
+        if response.status_code != 200:
+            raise Exception
+
+        return response.json()
+
+    return fetch_with_retries(api_url, handle, retries, _session=_session, _retry_policy=_retry_policy,
+                              _rate_limiter=_rate_limiter, verify=_verify, timeout=_timeout, headers=_headers or {})
+
+
+def get_page_tree(driver, _sleep=1):
+    settle(driver, _sleep, 'get_page_tree')
+    return html.fromstring(driver.page_source)
+
+
+def get_file(file_url, file_path, retries=2, _session=None, _stream=False, _max_size=None, _chunk_size=65536,
+             _retry_policy=None, _rate_limiter=None, _not_found=False):
+    """This function downloads the file and stores it locally.
+
+    Args:
+        file_url (str): The URL of the file to download.
+        file_path (str): The relative path of the file where it needs to be stored.
+        retries (int): The number of attempts before giving up.
+        _session (Session): The session to download the file with, the shared pooled session is used by default.
+        _stream (bool): If True then the body is written to disk in chunks instead of being buffered in memory.
+        _max_size (int): The maximum allowed size of the file in bytes when streaming, no limit by default.
+        _chunk_size (int): The number of bytes read from the network at a time when streaming.
+        _retry_policy (RetryPolicy): The policy of the retries, default_retry_policy by default.
+        _rate_limiter (RateLimiter): If provided then every attempt waits for a token of the host.
+        _not_found: The value returned when the file is not found (404), False by default.
+
+    Returns:
+        Status (bool): True if the file is downloaded successfully, Otherwise False
+    """
+
+    def handle(response):
+
+        if response.status_code != 200:
+            raise Exception
+
+        if not _stream:
+            save_file_locally(file_path, response.content)
+            return True
+
+        content_length = response.headers.get('Content-Length', '')
+
+        if _max_size is not None and content_length.isdigit() and int(content_length) > _max_size:
+            print(f'File Size Error: "{file_url}" is larger than {_max_size} bytes.')
+            return False
+
+        if save_chunks_locally(file_path, response.iter_content(_chunk_size), _max_size=_max_size):
+            return True
+
+        print(f'File Size Error: "{file_url}" is larger than {_max_size} bytes.')
+        return False
+
+    return fetch_with_retries(file_url, handle, retries, _session=_session, _retry_policy=_retry_policy,
+                              _rate_limiter=_rate_limiter, _not_found=_not_found, timeout=15, stream=_stream)
+
+
+def _download_file_item(card_id, file_url, file_path, stream):
+    """This function downloads a single item of download_files, it is kept at module level so processes can pickle it."""
+    started = time()
+
+    try:
+        status = {True: 'Downloaded', 'Not Found': 'Not Found'}.get(
+            get_file(file_url, file_path, _stream=stream, _not_found='Not Found'), 'Failed')
+    except Exception as e:
+        status = f'Error: {e!r}'
+
+    return [card_id, file_url, file_path, status, f'{time() - started:.2f}']
+
+
+def record_download_statuses(statuses, futures, _manifest=None, _pipeline=None, _frontier=None):
+    """This function collects the status rows of finished downloads, then records the downloaded ones in the manifest
+    and queues them for uploading."""
+    rows = [future.result() for future in futures]
+    statuses.extend(rows)
+
+    downloaded = [row for row in rows if row[3] == 'Downloaded']
+
+    if _frontier is not None:
+        _frontier.complete(row[0] for row in downloaded)
+
+        for row in rows:
+
+            if row[3] != 'Downloaded':
+                _frontier.fail([row[0]], _error=row[3], _permanent=row[3] == 'Not Found')
+
+    if _manifest is not None:
+        _manifest.add_many((row[0], row[2]) for row in downloaded)
+
+    if _pipeline is not None:
+
+        for row in downloaded:
+            _pipeline.put(row[2])
+
+
+def download_files(items, src_dir, key_index, value_index, _workers=16, _use_processes=False, _stream=False,
+                   _extension=None, _manifest=None, _pipeline=None, _frontier=None):
+    """This function downloads the files of the provided dictionary in parallel into the source directory.
+
+    Args:
+        items (dict): A dictionary holding CARD_IDs as keys and rows of the records CSV as values.
+        src_dir (str): The relative path of the local directory where files are being downloaded.
+        key_index (int): The index of the column that points to the Unique Identifier Column in the records CSV.
+        value_index (int): The index of the column that points to the URLs of the files in the records CSV.
+        _workers (int): The number of threads (or processes) downloading at the same time.
+        _use_processes (bool): If True then a process pool is used instead of a thread pool,
+                               the calling script must then be guarded by if __name__ == '__main__'.
+        _stream (bool): If True then files are streamed to disk instead of being buffered in memory.
+        _extension (str): The extension of the stored files, by default it is taken from the URL or jpg.
+        _manifest (DownloadManifest): If provided then every downloaded file is recorded in it as it lands.
+        _pipeline (UploadPipeline): If provided then every downloaded file is queued for uploading as it lands.
+        _frontier (CrawlFrontier): If provided then every item is completed or failed in it as it finishes.
+
+    Returns:
+        statuses (list): A row of [CARD_ID, URL, File Path, Status, Seconds] for every item.
+    """
+    create_files_dir(src_dir)
+
+    statuses = []
+    total = len(items)
+    pending = set()
+
+    pool_class = ProcessPoolExecutor if _use_processes else ThreadPoolExecutor
+
+    with pool_class(max_workers=_workers) as pool:
+
+        for card_id, row in items.items():
+
+            if isinstance(row, (list, tuple)):
+                card_id = row[key_index].lower().strip()
+                file_url = row[value_index].strip()
+            else:
+                file_url = str(row).strip()
+
+            extension = _extension or Path(urlparse(file_url).path).suffix.lstrip('.') or 'jpg'
+            file_path = f'{src_dir}/{card_id}.{extension}'
+
+            pending.add(pool.submit(_download_file_item, card_id, file_url, file_path, _stream))
+
+            # Keep a bounded number of items queued so huge dictionaries do not turn into huge lists of futures.
+            if len(pending) >= _workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                record_download_statuses(statuses, done, _manifest, _pipeline, _frontier)
+
+                write_to_console(f'Downloading Files: {len(statuses)}/{total} | Time: {time_progress()}')
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            record_download_statuses(statuses, done, _manifest, _pipeline, _frontier)
+
+            write_to_console(f'Downloading Files: {len(statuses)}/{total} | Time: {time_progress()}')
+
+    downloaded = sum(1 for status in statuses if status[3] == 'Downloaded')
+    print(f'\nDownloaded Files: {downloaded}/{total} | Failed: {total - downloaded}')
+
+    return statuses
+
+
+def download_frontier_files(frontier, src_dir, _batch_size=1000, _workers=16, _stream=False, _extension=None,
+                            _manifest=None, _pipeline=None):
+    """This function leases batches of items from the frontier and downloads them until nothing is pending.
+
+    It can run in several processes on the same frontier at the same time, and a crashed run resumes from the
+    frontier without rescanning the source directory. Items waiting for their retry delay are left pending
+    for a later run.
+
+    Args:
+        frontier (CrawlFrontier): The frontier holding the CARD_IDs and URLs of the files.
+        src_dir (str): The relative path of the local directory where files are being downloaded.
+        _batch_size (int): The number of items leased at a time, it needs to finish within the lease of the frontier.
+
+    Returns:
+        statuses (list): A row of [CARD_ID, URL, File Path, Status, Seconds] for every item.
+    """
+    statuses = []
+
+    while True:
+        items = frontier.lease(_count=_batch_size)
+
+        if not items:
+            break
+
+        statuses.extend(download_files(items, src_dir, None, None, _workers=_workers, _stream=_stream,
+                                       _extension=_extension, _manifest=_manifest, _pipeline=_pipeline,
+                                       _frontier=frontier))
+
+    return statuses
+
+
+# Below are the Functions related to the asynchronous Backend that use aiohttp module.
+
+
+def create_async_session(_concurrency=100, _per_host=8, _headers=None):
+    """This function creates an aiohttp session whose connector caps the open connections.
+
+    Args:
+        _concurrency (int): The maximum number of connections open at the same time.
+        _per_host (int): The maximum number of connections open to a single host.
+        _headers (dict): The headers that will be sent with every request of this session.
+
+    Raises:
+        ImportError: If the aiohttp module is not installed.
+
+    Returns:
+        session (ClientSession): The session object that can be passed to async_get_tree and async_get_file.
+    """
+    if aiohttp is None:
+        raise ImportError('The aiohttp module is required for the asynchronous crawl engine.')
+
+    connector = aiohttp.TCPConnector(limit=_concurrency, limit_per_host=_per_host)
+
+    return aiohttp.ClientSession(connector=connector, headers=_headers)
+
+
+async def _async_fetch(session, url, retries, _verify=True, _timeout=15, _retry_policy=None, _rate_limiter=None):
+    """This function fetches the body of the URL with the same retry rules as fetch_with_retries.
+
+    Returns:
+        content (bytes): The body of the response if the status is 200, Otherwise False
+    """
+    policy = _retry_policy or default_retry_policy
+
+    attempts = 0
+    connection_errors = 0
+
+    while True:
+
+        if _rate_limiter is not None:
+            delay = _rate_limiter.reserve(url)
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        retry_after = None
+
+        try:
+            async with session.get(url, ssl=None if _verify else False,
+                                   timeout=aiohttp.ClientTimeout(total=_timeout)) as response:
+
+                if response.status == 200:
+                    return await response.read()
+                elif response.status == 404:
+                    return False
+                elif not policy.should_retry(response.status):
+                    return False
+
+                retry_after = response.headers.get('Retry-After')
+
+                if response.status == 429 and _rate_limiter is not None:
+                    _rate_limiter.pause(url, policy.get_delay(attempts + 1, retry_after))
+
+        except Exception as e:
+
+            if '[Errno 11001] getaddrinfo failed' in str(e):
+                write_to_console('Internet Connection Error! Retrying...')
+                connection_errors += 1
+
+                if connection_errors >= policy.max_connection_errors:
+                    return False
+
+                await asyncio.sleep(policy.get_delay(connection_errors))
+                continue
+
+        attempts += 1
+
+        if attempts >= retries:
+            return False
+
+        await asyncio.sleep(policy.get_delay(attempts, retry_after))
+
+
+async def async_get_tree(page_url, session, retries=2, _verify=True, _timeout=15, _retry_policy=None,
+                         _rate_limiter=None):
+    """This function is the asynchronous counterpart of get_tree.
+
+    Args:
+        page_url (str): The URL of the page to fetch.
+        session (ClientSession): The session created by create_async_session.
+        retries (int): The number of attempts before giving up.
+        _verify (bool): If False then the TLS certificate of the server is not verified.
+        _timeout (int): The number of seconds to wait for the server to respond.
+        _retry_policy (RetryPolicy): The policy of the retries, default_retry_policy by default.
+        _rate_limiter (RateLimiter): If provided then every attempt waits for a token of the host.
+
+    Returns:
+        tree (elem): The parsed page if it is fetched successfully, Otherwise False
+    """
+    content = await _async_fetch(session, page_url, retries, _verify=_verify, _timeout=_timeout,
+                                 _retry_policy=_retry_policy, _rate_limiter=_rate_limiter)
+
+    if content is False:
+        return False
+
+    return html.fromstring(content)
+
+
+async def async_get_file(file_url, file_path, session, retries=2, _retry_policy=None, _rate_limiter=None):
+    """This function is the asynchronous counterpart of get_file.
+
+    Args:
+        file_url (str): The URL of the file to download.
+        file_path (str): The relative path of the file where it needs to be stored.
+        session (ClientSession): The session created by create_async_session.
+        retries (int): The number of attempts before giving up.
+        _retry_policy (RetryPolicy): The policy of the retries, default_retry_policy by default.
+        _rate_limiter (RateLimiter): If provided then every attempt waits for a token of the host.
+
+    Returns:
+        Status (bool): True if the file is downloaded successfully, Otherwise False
+    """
+    content = await _async_fetch(session, file_url, retries, _retry_policy=_retry_policy, _rate_limiter=_rate_limiter)
+
+    if content is False:
+        return False
+
+    await asyncio.get_running_loop().run_in_executor(None, save_file_locally, file_path, content)
+    return True
+
+
+def _iterate_crawl_items(items, value_index):
+    """This function yields (key, url) pairs from a list of URLs or from a CARD_ID dictionary."""
+
+    if isinstance(items, dict):
+
+        for key, value in items.items():
+
+            if value_index is not None:
+                value = value[value_index]
+
+            yield key, str(value).strip()
+    else:
+
+        for url in items:
+            yield url, url
+
+
+async def async_crawl(items, fetch, _value_index=None, _concurrency=100, _per_host=8, _session=None):
+    """This function runs fetch for every URL while keeping a bounded number of requests in flight.
+
+    Every host gets its own queue of URLs and its own cap, and a request is started for any host with a free
+    slot, so URLs of a saturated host wait in its queue without holding up the URLs of the other hosts.
+    The iterable is consumed only as fast as the requests finish, at most _concurrency * 10 URLs are queued.
+
+    Args:
+        items (dict | iterable): A dictionary holding CARD_IDs as keys and URLs (or rows) as values, or plain URLs.
+        fetch (coroutine function): Called as fetch(session, key, url) for every item, e.g. a wrapper of async_get_file.
+        _value_index (int): The index of the URL in the row when the dictionary values are rows.
+        _concurrency (int): The maximum number of requests in flight at the same time.
+        _per_host (int): The maximum number of requests in flight to a single host.
+        _session (ClientSession): The session to use, a new one is created and closed if not provided.
+
+    Returns:
+        results (dict): A dictionary holding CARD_IDs (or URLs) as keys and results of fetch as values.
+    """
+    results = {}
+    queued = {}  # The queue of URLs of every host, a host without queued URLs has no entry.
+    active = {}  # The number of requests in flight of every host.
+    ready = deque()  # The hosts having queued URLs and a free slot.
+    tasks = set()
+    finished = asyncio.Event()
+    max_queued = _concurrency * 10
+    queued_count = 0
+
+    session = _session or create_async_session(_concurrency=_concurrency, _per_host=_per_host)
+
+    async def fetch_item(host, key, url):
+
+        try:
+            results[key] = await fetch(session, key, url)
+        except Exception as e:
+            print(f'Crawl Error: "{url}" failed with {e!r}')
+            results[key] = False
+        finally:
+            tasks.discard(asyncio.current_task())
+            active[host] -= 1
+
+            # The host was saturated, its slot is free again.
+            if host in queued and active[host] == _per_host - 1:
+                ready.append(host)
+
+            start_requests()
+            finished.set()
+
+    def start_requests():
+        nonlocal queued_count
+
+        while ready and len(tasks) < _concurrency:
+            host = ready.popleft()
+            key, url = queued[host].popleft()
+            queued_count -= 1
+            active[host] = active.get(host, 0) + 1
+
+            if not queued[host]:
+                del queued[host]
+            elif active[host] < _per_host:
+                ready.append(host)
+
+            tasks.add(asyncio.ensure_future(fetch_item(host, key, url)))
+
+    try:
+        for key, url in _iterate_crawl_items(items, _value_index):
+
+            while queued_count >= max_queued:
+                finished.clear()
+                await finished.wait()
+
+            host = urlparse(url).netloc
+
+            if host not in queued:
+                queued[host] = deque()
+
+                if active.get(host, 0) < _per_host:
+                    ready.append(host)
+
+            queued[host].append((key, url))
+            queued_count += 1
+            start_requests()
+
+        while tasks:
+            finished.clear()
+            await finished.wait()
+    finally:
+        # Nothing is started any more while the requests in flight are cancelled.
+        ready.clear()
+
+        for task in list(tasks):
+            task.cancel()
+
+        if _session is None:
+            await session.close()
+
+    return results
+
+
+def crawl(items, fetch, _value_index=None, _concurrency=100, _per_host=8):
+    """This function runs async_crawl to completion from the synchronous code.
+
+    Args:
+        items (dict | iterable): A dictionary holding CARD_IDs as keys and URLs (or rows) as values, or plain URLs.
+        fetch (coroutine function): Called as fetch(session, key, url) for every item.
+        _value_index (int): The index of the URL in the row when the dictionary values are rows.
+        _concurrency (int): The maximum number of requests in flight at the same time.
+        _per_host (int): The maximum number of requests in flight to a single host.
+
+    Returns:
+        results (dict): A dictionary holding CARD_IDs (or URLs) as keys and results of fetch as values.
+    """
+    return asyncio.run(async_crawl(items, fetch, _value_index=_value_index,
+                                   _concurrency=_concurrency, _per_host=_per_host))
+
+
+def get_windows_chrome_version():
+    cmd = "(Get-Item (Get-ItemProperty 'HKLM:\SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths\chrome.exe').'(Default)').VersionInfo"
+    version_string = subprocess.run(["powershell", "-Command", cmd], capture_output=True)
+
+    item_details = {}
+
+    items = str(version_string.stdout)[2:-1].split('\\r\\n')
+
+    for item in items:
+
+        if item and item.isascii():
+            cols = item.split()
+
+            if len(cols) > 0 and cols[0].replace('-', '').strip():
+                cols[2] = ' '.join(cols[2:]).replace('\\\\', '\\')
+
+                if len(item_details) == 0:
+
+                    for col in cols:
+                        item_details[col] = []
+                else:
+                    index = 0
+
+                    for key in item_details:
+                        # item_details[key].append(cols[index])
+                        item_details[key] = cols[index]
+                        index += 1
+
+    return item_details
+
+
+def get_installed_chrome_version():
+    osname = platform.system()
+
+    if osname == 'Darwin':
+        install_path = "/Applications/Google\ Chrome.app/Contents/MacOS/Google\ Chrome"
+        version_string = ""
+        return version_string
+
+    elif osname == 'Windows':
+        product_details = get_windows_chrome_version()
+        return product_details["FileVersion"]
+    elif osname == 'Linux':
+        install_path = "/usr/bin/google-chrome"
+        cmd = "google-chrome --version"
+    else:
+        raise NotImplemented(f"Unknown OS '{osname}'")
+
+
+def download_chrome_driver_for_specific_version_of_chrome_browser(chrome_version):
+    chrome_driver_filename = ''
+
+    response = requests.get(chrome_driver_downloads_url)
+
+    if response.status_code == 200:
+        tree = html.fromstring(response.content)
+
+        major_chrome_version = chrome_version.split('.')[0]
+        chrome_version_link = get_tag_text(tree, f'.//a[contains(text(), "ChromeDriver {major_chrome_version}.")]/@href')
+
+        if chrome_version_link:
+            chrome_path = chrome_version_link.split('path=')[-1].replace('/', '').strip()
+            chrome_download_link = f'https://chromedriver.storage.googleapis.com/{chrome_path}/chromedriver_win32.zip'
+            chrome_driver_name = Path(chrome_download_link).name
+
+            print('Downloading chromedriver...')
+            chrome_driver_filename = wget.download(chrome_download_link, chrome_driver_name)
+            print('Chromedriver downloaded successfully!')
+        else:
+            print(f'Unable to find Chrome Driver Version link from Chrome Downloads page: {chrome_driver_downloads_url}')
+    else:
+        print(f'Unable to fetch Chrome Driver Version link from Chrome Downloads link: {chrome_driver_downloads_url}')
+
+    return chrome_driver_filename
+
+
+def extract_chrome_driver_file_to_dest_dir(chrome_driver_filename, chrome_executable_path):
+
+    chrome_executable_filepath = f'{chrome_executable_path}/{chrome_executable_filename}'
+
+    with ZipFile(chrome_driver_filename, 'r') as _zip:
+        # printing all the contents of the zip file
+        _zip.printdir()
+
+        print('Extracting all the files now...')
+        _zip.extractall()
+
+    shutil.move(chrome_executable_filename, chrome_executable_filepath)
+    print(f'Placed "{chrome_executable_filename}" to {chrome_executable_filepath}.')
+
+    os.remove(chrome_driver_filename)
+    print(f'Removed {chrome_driver_filename} from current directory.')
+
+
+def download_chrome_driver(download_path=''):
+
+    if not download_path:
+        download_path = local_storage_path
+
+    chrome_version = get_installed_chrome_version()
+
+    chrome_driver_filename = download_chrome_driver_for_specific_version_of_chrome_browser(chrome_version)
+
+    if chrome_driver_filename:
+        extract_chrome_driver_file_to_dest_dir(chrome_driver_filename, download_path)
+
+    print('Successfully downloaded the chromedriver.')
+
+
+def get_recursive_filepaths(directory):
+    """
+    This function will generate the file names in a directory
+    tree by walking the tree either top-down or bottom-up. For each
+    directory in the tree rooted at directory top (including top itself),
+    it yields a 3-tuple (dirpath, dirnames, filenames).
+    """
+    file_paths = []
+
+    for root, directories, files in os.walk(directory):
+
+        for filename in files:
+            filepath = os.path.join(root, filename)
+            file_paths.append(filepath)
+
+    return file_paths
+
+
+def get_filepaths(directory, _extension='html', _depth=1):
+    directory = directory.replace('./', '').strip('/')
+    directory_depth = '/*' * _depth
+
+    if ':/' not in directory:
+        directory_path_pattern = f'./{directory}{directory_depth}.{_extension}'
+    else:
+        directory_path_pattern = f'{directory}{directory_depth}.{_extension}'
+
+    filepaths = glob(directory_path_pattern)
+
+    print(f'Fetching Files | Count: {len(filepaths)} | Dir: {directory_path_pattern}')
+
+    return filepaths
+
+
+def parse_file_fields(file_path, fields):
+    """This function reads a saved HTML file and extracts the schema of fields from it.
+
+    Args:
+        file_path (str): The relative path of the saved HTML file.
+        fields (dict): The schema of fields as accepted by get_tags_text.
+
+    Returns:
+        row (list): The CARD_ID (name of the file) followed by the values of the fields, Otherwise None
+                    if the file can not be parsed.
+    """
+    tree = read_file_as_tree(file_path)
+
+    if tree is False:
+        return None
+
+    values = get_tags_text(tree, fields)
+
+    return [Path(file_path).stem] + [values[name] for name in fields]
+
+
+def parse_files_to_csv(filepaths, fields, output_filename, _workers=None, _chunksize=64):
+    """This function parses the saved HTML files across a pool of processes and writes the fields to a CSV file.
+
+    Rows are written in the order of the provided file paths as soon as they are parsed, so the CSV grows
+    while the archive is being processed. The schema is sent to the processes, so the clean functions
+    in it must be defined at module level. The calling script must be guarded by if __name__ == '__main__'.
+
+    Args:
+        filepaths (list): The relative paths of the saved HTML files, e.g. the result of get_filepaths.
+        fields (dict): The schema of fields as accepted by get_tags_text.
+        output_filename (str): The relative path of the CSV file to write.
+        _workers (int): The number of processes, the number of CPUs by default.
+        _chunksize (int): The number of files sent to a process at a time.
+
+    Returns:
+        count (int): The number of rows written.
+    """
+    count = 0
+    total = len(filepaths)
+
+    with get_csv_writer(output_filename) as writer, Pool(processes=_workers) as pool:
+        writer.writerow(['CARD_ID'] + list(fields))
+
+        for index, row in enumerate(pool.imap(partial(parse_file_fields, fields=fields), filepaths, _chunksize), 1):
+
+            if row is not None:
+                writer.writerow(row)
+                count += 1
+
+            if index % 1000 == 0 or index == total:
+                write_to_console(f'Parsing Files: {index}/{total} | Time: {time_progress()}')
+
+    print(f'\nParsed Files: {count}/{total} | Output: {output_filename}')
+    return count
+
+
+def generate_card_ids(starting_id, ending_id):
+    return {str(card_id): '' for card_id in range(starting_id, ending_id + 1)}
+
+
+def remove_existing_files(card_ids, dir_pattern):
+    scraped_card_ids = glob(dir_pattern)
+
+    for file_path in scraped_card_ids:
+        card_id = Path(file_path).stem
+
+        try:
+            del card_ids[card_id]
+        except KeyError:
+            pass
+
+
+def save_bytes_atomically(file_path, content):
+    """This function replaces the file with the provided bytes, so a crash never leaves a half written file."""
+    temp_path = f'{file_path}.{get_random_string(8)}.part'
+
+    with open(temp_path, mode='wb') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(temp_path, file_path)
+
+
+# The number of set bits of every byte value, used to count the IDs of a loaded IDBitmap.
+_bit_counts = bytes(bin(byte).count('1') for byte in range(256))
+
+
+class IDBitmap:
+    """This class keeps a set of numeric CARD_IDs of a range as one bit per ID.
+
+    A range of 100M IDs takes 12.5 MB in memory and on disk, instead of gigabytes of string keys.
+
+    Args:
+        starting_id (int): The first ID of the range.
+        ending_id (int): The last ID of the range (inclusive).
+        _filename (str): If provided then the bitmap is loaded from this file if it exists and save() writes to it.
+    """
+
+    def __init__(self, starting_id, ending_id, _filename=None):
+        self.starting_id = starting_id
+        self.ending_id = ending_id
+        self.filename = _filename
+
+        size = (ending_id - starting_id) // 8 + 1
+
+        self._bits = bytearray(size)
+
+        if _filename and os.path.exists(_filename):
+
+            if os.path.getsize(_filename) != size:
+                raise ValueError(f'The bitmap "{_filename}" does not match the range {starting_id}-{ending_id}.')
+
+            # Read straight into the bitmap instead of holding a second copy of the file in memory.
+            with open(_filename, mode='rb') as f:
+                f.readinto(self._bits)
+
+        # Count the set bits a megabyte at a time, so loading never holds more than one extra slice in memory.
+        self._count = sum(sum(self._bits[index:index + 1048576].translate(_bit_counts))
+                          for index in range(0, len(self._bits), 1048576))
+
+    def __contains__(self, card_id):
+        index = int(card_id) - self.starting_id
+
+        if index < 0 or int(card_id) > self.ending_id:
+            return False
+
+        return bool(self._bits[index >> 3] & (1 << (index & 7)))
+
+    def __len__(self):
+        return self._count
+
+    def add(self, card_id):
+        """This function adds the ID to the set, IDs outside the range are ignored."""
+        index = int(card_id) - self.starting_id
+
+        if index < 0 or int(card_id) > self.ending_id:
+            return
+
+        mask = 1 << (index & 7)
+
+        if not self._bits[index >> 3] & mask:
+            self._bits[index >> 3] |= mask
+            self._count += 1
+
+    def discard(self, card_id):
+        """This function removes the ID from the set if it is present."""
+        index = int(card_id) - self.starting_id
+
+        if index < 0 or int(card_id) > self.ending_id:
+            return
+
+        mask = 1 << (index & 7)
+
+        if self._bits[index >> 3] & mask:
+            self._bits[index >> 3] &= ~mask
+            self._count -= 1
+
+    def iter_missing(self):
+        """This function yields the IDs of the range that are not in the set, as strings like generate_card_ids.
+
+        Bytes having all eight IDs present are skipped as a whole.
+        """
+        for byte_index, byte in enumerate(self._bits):
+
+            if byte == 0xFF:
+                continue
+
+            for bit in range(8):
+                card_id = self.starting_id + (byte_index << 3) + bit
+
+                if card_id > self.ending_id:
+                    return
+
+                if not byte & (1 << bit):
+                    yield str(card_id)
+
+    def save(self, _filename=None):
+        """This function writes the bitmap to the disk atomically."""
+        save_bytes_atomically(_filename or self.filename, bytes(self._bits))
+
+
+class BloomFilter:
+    """This class is a fixed size Bloom filter over 16 byte digests.
+
+    It answers "definitely not present" or "maybe present" using about 1.2 bytes per item for a 1% error rate.
+
+    Args:
+        capacity (int): The number of items the filter is sized for.
+        _error_rate (float): The rate of false "maybe present" answers at full capacity.
+    """
+
+    def __init__(self, capacity, _error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(_error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+
+        self._bits = bytearray(self.size // 8 + 1)
+
+    def _positions(self, digest):
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:16], 'little') | 1
+
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, digest):
+
+        for position in self._positions(digest):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest):
+
+        for position in self._positions(digest):
+
+            if not self._bits[position >> 3] & (1 << (position & 7)):
+                return False
+
+        return True
+
+    def to_bytes(self, _count=0):
+        return struct.pack('<QQQ', self.size, self.hashes, _count) + bytes(self._bits)
+
+    def load_bytes(self, content):
+        """This function loads the bits saved by to_bytes.
+
+        Returns:
+            count (int): The count saved along the bits, or None if the saved filter has another size.
+        """
+        size, hashes, count = struct.unpack('<QQQ', content[:24])
+
+        if size != self.size or hashes != self.hashes:
+            return None
+
+        self._bits = bytearray(content[24:])
+        return count
+
+
+class URLSet(SQLiteKeyIndex):
+    """This class keeps a persistent set of URLs (or any strings) with a Bloom filter in front of an exact store.
+
+    Only 16 byte digests of the URLs are stored. Most lookups of new URLs are answered by the in-memory filter,
+    and only "maybe present" answers are confirmed by the indexed SQLite store.
+
+    Args:
+        index_filename (str): The relative path to the SQLite file, the filter is saved next to it as .bloom
+        _capacity (int): The number of URLs the filter is sized for.
+        _error_rate (float): The rate of lookups that need the SQLite store although the URL is new.
+    """
+    table_name = 'urls'
+    columns = ()
+
+    def __init__(self, index_filename, _capacity=10000000, _error_rate=0.001):
+        super().__init__(index_filename)
+
+        self.bloom_filename = f'{index_filename}.bloom'
+        self._bloom = BloomFilter(_capacity, _error_rate=_error_rate)
+
+        count = None
+
+        if os.path.exists(self.bloom_filename):
+
+            with open(self.bloom_filename, mode='rb') as f:
+                count = self._bloom.load_bytes(f.read())
+
+        # The filter is only saved on close, rebuild it from the exact store if it is missing or stale.
+        if count != len(self):
+            self._rebuild_bloom()
+
+    @staticmethod
+    def get_digest(url):
+        return hashlib.blake2b(url.encode('utf-8', errors='ignore'), digest_size=16).digest()
+
+    def _rebuild_bloom(self):
+
+        with self._lock:
+
+            for (key,) in self._connection.execute(f'SELECT card_id FROM {self.table_name}'):
+                self._bloom.add(bytes.fromhex(key))
+
+    def __contains__(self, url):
+        digest = self.get_digest(url)
+
+        if digest not in self._bloom:
+            return False
+
+        return super().__contains__(digest.hex())
+
+    def add(self, url):
+        """This function adds the URL to the set."""
+        self.add_many([url])
+
+    def add_many(self, urls):
+        """This function adds a batch of URLs to the set in a single transaction."""
+        digests = [self.get_digest(url) for url in urls]
+
+        with self._lock:
+
+            for digest in digests:
+                self._bloom.add(digest)
+
+        self._insert_rows([(digest.hex(),) for digest in digests])
+
+    def skip_present(self, items, _batch_size=500):
+        """This function removes the keys that are present in the set from the provided dictionary.
+
+        Only the keys that pass the filter are looked up in the SQLite store.
+        """
+        candidates = {}
+
+        for key in items:
+            digest = self.get_digest(key)
+
+            if digest in self._bloom:
+                candidates[digest.hex()] = key
+
+        present = dict.fromkeys(candidates)
+        super().skip_present(present, _batch_size=_batch_size)
+
+        count = 0
+
+        for digest in candidates:
+
+            if digest not in present:
+                del items[candidates[digest]]
+                count += 1
+
+        return count
+
+    def save(self):
+        """This function saves the filter next to the store, so the next run does not rebuild it."""
+
+        count = len(self)
+
+        with self._lock:
+            content = self._bloom.to_bytes(_count=count)
+
+        save_bytes_atomically(self.bloom_filename, content)
+
+    def close(self):
+        self.save()
+        super().close()
+
+
+def iter_card_ids(starting_id, ending_id, _seen=None):
+    """This function yields the CARD_IDs of the range that are not seen yet, without building a dictionary.
+
+    Args:
+        starting_id (int): The first ID of the range.
+        ending_id (int): The last ID of the range (inclusive).
+        _seen (IDBitmap): The IDs that are already scraped, every ID is yielded if not provided.
+
+    Yields:
+        card_id (str): Every remaining CARD_ID of the range.
+    """
+    if _seen is None:
+
+        for card_id in range(starting_id, ending_id + 1):
+            yield str(card_id)
+    else:
+        yield from _seen.iter_missing()
+
+
+def mark_existing_files(seen, dir_pattern):
+    """This function adds the CARD_IDs of the files matching the pattern to the set of seen IDs.
+
+    It is the counterpart of remove_existing_files for an IDBitmap or URLSet, and needs to run only once
+    when the set is first created, as the set is persisted afterwards.
+
+    Args:
+        seen (IDBitmap | URLSet): The set of seen CARD_IDs.
+        dir_pattern (str): The glob pattern of the scraped files, e.g. Pages/*.html
+
+    Returns:
+        count (int): The number of files found.
+    """
+    count = 0
+
+    for file_path in glob(dir_pattern):
+        card_id = Path(file_path).stem
+
+        if isinstance(seen, IDBitmap) and not card_id.isdigit():
+            continue
+
+        seen.add(card_id)
+        count += 1
+
+    return count
+
+
+class CrawlFrontier:
+    """This class is a persistent queue of CARD_IDs and URLs to crawl, kept in a SQLite file.
+
+    Every item is pending, in_flight, done or failed. Items are leased in order of priority, a lease that is not
+    completed in time (e.g. the worker crashed) makes the item pending again, and an item is failed for good after
+    _max_attempts leases. A failed attempt makes the item wait _retry_delay_secs (doubled on every attempt) before
+    it is leased again. Several processes can lease from the same file at the same time, every lease runs in
+    a single write transaction so no item is handed out twice.
+
+    Args:
+        frontier_filename (str): The relative path to the SQLite file holding the frontier.
+        _lease_secs (int): The number of seconds a leased item stays in_flight before it is handed out again.
+        _max_attempts (int): The number of leases of an item before it is marked as failed.
+        _retry_delay_secs (int): The number of seconds a failed item waits before its second attempt.
+    """
+
+    def __init__(self, frontier_filename, _lease_secs=300, _max_attempts=3, _retry_delay_secs=60):
+        self.frontier_filename = frontier_filename
+        self.lease_secs = _lease_secs
+        self.max_attempts = _max_attempts
+        self.retry_delay_secs = _retry_delay_secs
+
+        self._lock = Lock()
+        self._connection = None
+        self._pid = None
+
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute('CREATE TABLE IF NOT EXISTS frontier (card_id TEXT PRIMARY KEY, url TEXT, '
+                               'state TEXT, priority INTEGER, attempts INTEGER, lease_until REAL, error TEXT)')
+            connection.execute('CREATE INDEX IF NOT EXISTS frontier_pending ON frontier (state, priority DESC)')
+            connection.execute('CREATE INDEX IF NOT EXISTS frontier_leases ON frontier (state, lease_until)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getstate__(self):
+        # The connection is not shared with other processes, each process opens its own.
+        state = self.__dict__.copy()
+        state.update(_lock=None, _connection=None, _pid=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def __len__(self):
+        return self.counts().get('pending', 0)
+
+    def _get_connection(self):
+
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.frontier_filename, timeout=60, isolation_level=None,
+                                               check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._pid = os.getpid()
+
+        return self._connection
+
+    def _execute_transaction(self, statements):
+        """This function runs the (sql, parameters) statements in one write transaction and returns the cursors."""
+
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute('BEGIN IMMEDIATE')
+
+            try:
+                cursors = [connection.executemany(sql, parameters) if isinstance(parameters, list)
+                           else connection.execute(sql, parameters) for sql, parameters in statements]
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+
+        return cursors
+
+    def add(self, card_id, url, _priority=0):
+        """This function adds the item as pending, items already in the frontier are left as they are."""
+        return self.add_many({card_id: url}, _priority=_priority)
+
+    def add_many(self, items, _value_index=None, _priority=0):
+        """This function adds the items of the dictionary as pending, items already in the frontier are left as they are.
+
+        Args:
+            items (dict): A dictionary holding CARD_IDs as keys and URLs (or rows of the records CSV) as values.
+            _value_index (int): The index of the URL when the values are rows.
+            _priority (int): The priority of the items, higher priorities are leased first.
+
+        Returns:
+            count (int): The number of items added.
+        """
+        rows = [(card_id, url[_value_index] if _value_index is not None else url, 'pending', _priority, 0)
+                for card_id, url in items.items()]
+
+        cursor, = self._execute_transaction([('INSERT OR IGNORE INTO frontier (card_id, url, state, priority, '
+                                              'attempts) VALUES (?, ?, ?, ?, ?)', rows)])
+        return cursor.rowcount
+
+    def lease(self, _count=1):
+        """This function hands out the pending items of the highest priority and marks them as in_flight.
+
+        Args:
+            _count (int): The maximum number of items to lease.
+
+        Returns:
+            items (dict): A dictionary holding the leased CARD_IDs as keys and their URLs as values.
+        """
+        now = time()
+
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute('BEGIN IMMEDIATE')
+
+            try:
+                # Leases that expired belong to crashed or stuck workers, hand them out again or give up on them.
+                connection.execute('UPDATE frontier SET state = ?, error = ? WHERE state = ? AND lease_until < ? '
+                                   'AND attempts >= ?', ('failed', 'Lease expired', 'in_flight', now,
+                                                          self.max_attempts))
+                connection.execute('UPDATE frontier SET state = ? WHERE state = ? AND lease_until < ?',
+                                   ('pending', 'in_flight', now))
+
+                # Items that failed an attempt keep their retry time in lease_until until it has passed.
+                rows = connection.execute('SELECT card_id, url FROM frontier WHERE state = ? '
+                                          'AND (lease_until IS NULL OR lease_until <= ?) '
+                                          'ORDER BY priority DESC LIMIT ?', ('pending', now, _count)).fetchall()
+
+                connection.executemany('UPDATE frontier SET state = ?, attempts = attempts + 1, lease_until = ? '
+                                       'WHERE card_id = ?',
+                                       [('in_flight', now + self.lease_secs, card_id) for card_id, _ in rows])
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+
+        return dict(rows)
+
+    def complete(self, card_ids):
+        """This function marks the leased CARD_IDs as done."""
+        self._execute_transaction([('UPDATE frontier SET state = ?, lease_until = NULL, error = NULL '
+                                    'WHERE card_id = ?', [('done', card_id) for card_id in card_ids])])
+
+    def fail(self, card_ids, _error='', _permanent=False):
+        """This function makes the leased CARD_IDs pending again after the retry delay, or failed once they ran
+        out of attempts.
+
+        Args:
+            card_ids (iterable): The CARD_IDs of the leased items.
+            _error (str): The reason of the failure, kept with the items.
+            _permanent (bool): If True then the items are failed for good, e.g. their URL is not found.
+        """
+        now = time()
+
+        self._execute_transaction([('UPDATE frontier SET state = CASE WHEN ? OR attempts >= ? THEN ? ELSE ? END, '
+                                    'lease_until = ? + ? * (1 << (attempts - 1)), error = ? WHERE card_id = ?',
+                                    [(_permanent, self.max_attempts, 'failed', 'pending', now,
+                                      self.retry_delay_secs, _error, card_id) for card_id in card_ids])])
+
+    def mark_done(self, items):
+        """This function records the items of the dictionary as done, e.g. the files that were scraped before the
+        frontier existed, so they are never leased."""
+        self._execute_transaction([('INSERT OR REPLACE INTO frontier (card_id, url, state, priority, attempts) '
+                                    'VALUES (?, ?, ?, ?, ?)',
+                                    [(card_id, url, 'done', 0, 0) for card_id, url in items.items()])])
+
+    def retry_failed(self, _priority=None):
+        """This function makes the failed items pending again with their attempts reset.
+
+        Returns:
+            count (int): The number of items made pending.
+        """
+        if _priority is None:
+            cursor, = self._execute_transaction([('UPDATE frontier SET state = ?, attempts = 0, lease_until = NULL '
+                                                  'WHERE state = ?', ('pending', 'failed'))])
+        else:
+            cursor, = self._execute_transaction([('UPDATE frontier SET state = ?, attempts = 0, lease_until = NULL, '
+                                                  'priority = ? WHERE state = ?', ('pending', _priority, 'failed'))])
+
+        return cursor.rowcount
+
+    def counts(self):
+        """This function returns a dictionary holding the number of items in every state."""
+
+        with self._lock:
+            rows = self._get_connection().execute('SELECT state, COUNT(*) FROM frontier GROUP BY state').fetchall()
+
+        return dict(rows)
+
+    def close(self):
+
+        with self._lock:
+
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# Below are the Selenium Browser utils.
+
+
+def load_driver(headless=False, _fast=False, _block_resources=('image', 'font', 'media', 'tracker'),
+                _block_patterns=(), _page_load_strategy='eager', _window_size=(1280, 800), _capture_network=False):
+    """This function opens a Chrome browser after some configurations and returns chrome driver object.
+
+    Args:
+        headless (bool): True to run the Chrome browser in the foreground otherwise it will run in background.
+        _fast (bool): True to open the browser with the performance profile, the options below apply only to it.
+        _block_resources (tuple): The keys of blocked_resource_patterns whose requests are blocked.
+        _block_patterns (tuple): More URL patterns to block, * matches any characters.
+        _page_load_strategy (str): 'eager' returns once the DOM is ready, 'none' returns right away,
+                                   'normal' waits for every resource like the default profile.
+        _window_size (tuple): The width and height of the browser window.
+        _capture_network (bool): True to record the network events in the performance log, see NetworkRecorder.
+
+    Returns:
+        driver (WebDriver): The Chrome driver object to handle the Chrome browser.
+    """
+    chrome_options = Options()
+
+    chrome_options.add_argument("--disable-notifications")
+    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
+
+    if _fast:
+        chrome_options.add_argument(f"--window-size={_window_size[0]},{_window_size[1]}")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        chrome_options.page_load_strategy = _page_load_strategy
+    else:
+        chrome_options.add_argument("--start-maximized")
+
+    if headless:
+        chrome_options.add_argument("--headless")
+
+    if _capture_network:
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    chrome_executable_filepath = f'{local_storage_path}/{chrome_executable_filename}'
+
+    try:
+        driver = webdriver.Chrome(options=chrome_options, executable_path=chrome_executable_filepath)
+    except exceptions.WebDriverException:
+        driver = webdriver.Chrome(options=chrome_options)
+
+    if _fast:
+        block_urls(driver, [pattern for resource in _block_resources
+                            for pattern in blocked_resource_patterns[resource]] + list(_block_patterns))
+
+    return driver
+
+
+def block_urls(driver, url_patterns):
+    """This function makes the browser block the requests matching the URL patterns, e.g. *.png or *ads.com*
+
+    Returns:
+        Status (bool): True if the patterns are applied, Otherwise False (e.g. the browser is not Chrome)
+    """
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(url_patterns)})
+        return True
+    except Exception as e:
+        print(f'Driver Error: Could not block the URLs {e!r}')
+        return False
+
+
+def quit_driver(driver):
+    """This function closes the Chrome browser, ignoring the errors of a browser that already crashed."""
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+class DriverPool:
+    """This class keeps a fixed number of Chrome browsers open so they can be reused instead of started per job.
+
+    Browsers are checked out and back in, their cookies, storage and extra windows are cleared between uses,
+    and a browser is replaced after _max_pages uses, when its JavaScript heap gets too large or when it broke.
+    All browsers are closed on close() or when the interpreter exits.
+
+    Args:
+        _size (int): The number of browsers in the pool.
+        _max_pages (int): The number of check ins after which a browser is replaced by a fresh one.
+        _max_memory_mb (int): The JavaScript heap size of a page in MB after which its browser is replaced.
+        **kwargs: The options of load_driver the browsers are opened with, headless by default.
+    """
+
+    def __init__(self, _size=4, _max_pages=200, _max_memory_mb=1024, **kwargs):
+        kwargs.setdefault('headless', True)
+
+        self.size = _size
+        self.max_pages = _max_pages
+        self.max_memory_mb = _max_memory_mb
+        self.driver_options = kwargs
+
+        self._idle = Queue()
+        self._pages = {}
+        self._count = _size
+        self._lock = Lock()
+        self._closed = False
+
+        # Start the browsers in parallel, startup is mostly waiting on Chrome.
+        try:
+            with ThreadPoolExecutor(max_workers=_size) as pool:
+
+                for driver in pool.map(lambda _: self._open_driver(), range(_size)):
+                    self._idle.put(driver)
+        except Exception:
+            # The executor has waited for the other startups, quit every browser that did open before re-raising.
+            for driver in list(self._pages):
+                quit_driver(driver)
+
+            raise
+
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _open_driver(self):
+        driver = load_driver(**self.driver_options)
+
+        with self._lock:
+            self._pages[driver] = 0
+
+        return driver
+
+    def _replace_driver(self, driver):
+
+        with self._lock:
+            self._pages.pop(driver, None)
+
+        quit_driver(driver)
+
+        if self._closed:
+            return
+
+        try:
+            self._idle.put(self._open_driver())
+        except Exception as e:
+            # The next checkout opens the missing browser, so a failed restart does not shrink the pool for good.
+            print(f'Driver Error: {e!r}')
+
+            with self._lock:
+                self._count -= 1
+
+    def _get_memory_mb(self, driver):
+        try:
+            heap_size = driver.execute_script('return performance.memory ? performance.memory.usedJSHeapSize : 0')
+            return (heap_size or 0) / 1048576
+        except Exception:
+            return 0
+
+    def reset_driver(self, driver):
+        """This function closes the extra windows and clears the cookies and storage of the browser.
+
+        Returns:
+            Status (bool): True if the browser is reset successfully, Otherwise False
+        """
+        try:
+            windows = driver.window_handles
+
+            for window in windows[1:]:
+                driver.switch_to.window(window)
+                driver.close()
+
+            driver.switch_to.window(windows[0])
+            driver.delete_all_cookies()
+            driver.execute_script('try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}')
+            driver.get('about:blank')
+            return True
+        except Exception:
+            return False
+
+    def checkout(self, _timeout=None):
+        """This function waits for an idle browser and hands it out.
+
+        Args:
+            _timeout (int): The number of seconds to wait for an idle browser, it waits forever by default.
+
+        Returns:
+            driver (WebDriver): The Chrome driver object, it needs to be checked in after use.
+        """
+        if self._closed:
+            raise RuntimeError('The driver pool is closed.')
+
+        with self._lock:
+            missing = self._idle.empty() and self._count < self.size
+
+            if missing:
+                self._count += 1
+
+        if not missing:
+            return self._idle.get(timeout=_timeout)
+
+        try:
+            return self._open_driver()
+        except Exception:
+            with self._lock:
+                self._count -= 1
+            raise
+
+    def checkin(self, driver, _broken=False):
+        """This function returns the browser to the pool, it is replaced if it broke or served too many pages.
+
+        Args:
+            driver (WebDriver): The Chrome driver object returned by checkout.
+            _broken (bool): True if the browser raised an error and can not be trusted anymore.
+        """
+        with self._lock:
+            self._pages[driver] = self._pages.get(driver, 0) + 1
+            pages = self._pages[driver]
+
+        if self._closed:
+            quit_driver(driver)
+            return
+
+        if _broken or pages >= self.max_pages or self._get_memory_mb(driver) >= self.max_memory_mb \
+                or not self.reset_driver(driver):
+            self._replace_driver(driver)
+        else:
+            self._idle.put(driver)
+
+    @contextmanager
+    def driver(self, _timeout=None):
+        """This function checks out a browser for a with block and checks it back in afterwards,
+        the browser is replaced if the block raised an error."""
+        driver = self.checkout(_timeout=_timeout)
+
+        try:
+            yield driver
+        except Exception:
+            self.checkin(driver, _broken=True)
+            raise
+
+        self.checkin(driver)
+
+    def map(self, func, items):
+        """This function calls func(driver, item) for every item, running one item per browser of the pool.
+
+        Args:
+            func (function): The function scraping a single item with the provided browser.
+            items (iterable): The items to scrape, e.g. URLs of pages.
+
+        Yields:
+            result: The result of every item in the order of items, or the exception it raised.
+        """
 
-            sleep(0.5)
+        def run(item):
+            try:
+                with self.driver() as driver:
+                    return func(driver, item)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.size) as pool:
+            yield from pool.map(run, items)
+
+    def close(self):
+        """This function closes every browser of the pool."""
+        self._closed = True
+
+        with self._lock:
+            drivers = list(self._pages)
+            self._pages.clear()
+
+        for driver in drivers:
+            quit_driver(driver)
+
+
+# Following are the Functions to wait until the page settles after an action.
+
+
+_settle_script = '''
+const quietMs = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+// fetch and XMLHttpRequest are wrapped once per document to count the requests still in flight.
+if (!window.__settleRequests) {
+    const state = window.__settleRequests = {inFlight: 0, changed: performance.now()};
+    const start = () => { state.inFlight++; state.changed = performance.now(); };
+    const end = () => { state.inFlight = Math.max(0, state.inFlight - 1); state.changed = performance.now(); };
+    if (window.fetch) {
+        const fetch = window.fetch;
+        window.fetch = function() {
+            start();
+            try { return fetch.apply(this, arguments).finally(end); } catch (e) { end(); throw e; }
+        };
+    }
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        start();
+        this.addEventListener('loadend', end, {once: true});
+        try { return send.apply(this, arguments); } catch (e) { end(); throw e; }
+    };
+}
+const requests = window.__settleRequests, started = performance.now();
+let last = started;
+// Attribute changes are not watched, carousels and spinners change them all the time without loading content.
+const observer = new MutationObserver(() => { last = performance.now(); });
+observer.observe(document, {childList: true, subtree: true, characterData: true});
+// Finished resources (images, scripts, ...) are observed as they complete, the resource timing buffer may be full.
+const resources = new PerformanceObserver(list => {
+    if (list.getEntries().some(e => e.initiatorType !== 'beacon')) last = performance.now();
+});
+resources.observe({type: 'resource'});
+const timer = setInterval(() => {
+    const now = performance.now();
+    last = Math.max(last, requests.changed);
+    const quiet = requests.inFlight === 0 && now - last >= quietMs;
+    if ((document.readyState !== 'loading' && quiet) || now - started >= timeoutMs) {
+        clearInterval(timer);
+        observer.disconnect();
+        resources.disconnect();
+        done(now - started);
+    }
+}, 25);
+'''
+
+
+def configure_waits(_adaptive=True, _quiet_ms=150, _timeout_in_secs=10, _max_wait_factor=5):
+    """This function switches the Selenium helpers between fixed sleeps and adaptive waits after their actions.
+
+    In the adaptive mode a helper returns as soon as the document is parsed and neither the DOM changed
+    nor a request finished for _quiet_ms, with no fetch or XMLHttpRequest still in flight, instead of sleeping
+    for its _sleep. A page that never
+    goes quiet (e.g. a ticking clock) is waited for at most _max_wait_factor times the _sleep of the helper.
 
+    Args:
+        _adaptive (bool): True to wait for the page to settle, False to sleep for the fixed _sleep of the helpers.
+        _quiet_ms (int): The number of milliseconds without DOM mutations and requests that count as settled.
+        _timeout_in_secs (int): The maximum number of seconds to wait for a page that never settles.
+        _max_wait_factor (float): The maximum wait of a helper as a multiple of its _sleep.
+    """
+    global adaptive_waits, adaptive_wait_quiet_ms, adaptive_wait_timeout, adaptive_wait_factor
 
-def get_page_tree(driver, _sleep=1):
-    sleep(_sleep)
-    return html.fromstring(driver.page_source)
+    adaptive_waits = _adaptive
+    adaptive_wait_quiet_ms = _quiet_ms
+    adaptive_wait_timeout = _timeout_in_secs
+    adaptive_wait_factor = _max_wait_factor
 
 
-def get_file(file_url, file_path, retries=2):
+def wait_until_page_loaded(driver, _wait_in_secs=10):
+    """This function waits until the document of the current page is parsed, polling every 50 milliseconds.
 
-    while True:
+    Returns:
+        status (bool): True if the document is parsed in time, Otherwise False
+    """
+    try:
+        WebDriverWait(driver, _wait_in_secs, poll_frequency=0.05).until(
+            lambda d: d.execute_script('return document.readyState') != 'loading')
+        return True
+    except (exceptions.TimeoutException, exceptions.WebDriverException):
+        return False
 
-        try:
-            response = requests.get(file_url, timeout=15)
 
-            if response.status_code == 200:
-                save_file_locally(file_path, response.content)
-                return True
-            elif response.status_code == 404:
-                return False
-            else:
-                raise Exception
+def wait_until_settled(driver, _quiet_ms=None, _wait_in_secs=None):
+    """This function waits until the page is parsed and has neither added, removed or changed text in the DOM
+    nor made new requests (beacons aside) for a while.
 
-        except Exception as e:
+    Args:
+        driver (WebDriver): The Chrome driver object to handle the Chrome browser.
+        _quiet_ms (int): The number of quiet milliseconds, adaptive_wait_quiet_ms by default.
+        _wait_in_secs (int): The maximum number of seconds to wait, adaptive_wait_timeout by default.
 
-            if '[Errno 11001] getaddrinfo failed' in str(e):
-                write_to_console('Internet Connection Error! Retrying...')
-            else:
-                retries -= 1
+    Returns:
+        status (bool): True if the page settled in time, Otherwise False
+    """
+    quiet_ms = adaptive_wait_quiet_ms if _quiet_ms is None else _quiet_ms
+    wait_in_secs = adaptive_wait_timeout if _wait_in_secs is None else _wait_in_secs
 
-            if retries == 0:
-                return False
+    try:
+        return driver.execute_async_script(_settle_script, quiet_ms, wait_in_secs * 1000) < wait_in_secs * 1000
+    except exceptions.WebDriverException:
+        # The script is dropped when the action navigated to another page, wait for the new document instead.
+        return wait_until_page_loaded(driver, wait_in_secs)
 
-            sleep(0.5)
 
+def settle(driver, _sleep, _action='settle'):
+    """This function is called by the Selenium helpers after their action, it either sleeps for the fixed time
+    or waits for the page to settle, and records the time spent for get_wait_stats.
 
-def get_windows_chrome_version():
-    cmd = "(Get-Item (Get-ItemProperty 'HKLM:\SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths\chrome.exe').'(Default)').VersionInfo"
-    version_string = subprocess.run(["powershell", "-Command", cmd], capture_output=True)
+    Args:
+        driver (WebDriver): The Chrome driver object to handle the Chrome browser.
+        _sleep (float): The fixed time the helper sleeps for when the adaptive waits are off.
+        _action (str): The name the time is recorded under.
+    """
+    started = monotonic()
 
-    item_details = {}
+    if adaptive_waits:
+        max_wait = max(_sleep * adaptive_wait_factor, adaptive_wait_quiet_ms / 1000)
+        wait_until_settled(driver, _wait_in_secs=min(adaptive_wait_timeout, max_wait))
+    else:
+        sleep(_sleep)
 
-    items = str(version_string.stdout)[2:-1].split('\\r\\n')
+    waited = monotonic() - started
 
-    for item in items:
+    with _wait_stats_lock:
+        stats = _wait_stats.setdefault(_action, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += waited
+        stats[2] += _sleep
 
-        if item and item.isascii():
-            cols = item.split()
 
-            if len(cols) > 0 and cols[0].replace('-', '').strip():
-                cols[2] = ' '.join(cols[2:]).replace('\\\\', '\\')
+def get_wait_stats(_reset=False):
+    """This function reports the time spent waiting after the actions of the Selenium helpers.
 
-                if len(item_details) == 0:
+    Returns:
+        stats (dict): The name of every action as keys and dictionaries of calls, waited seconds, the seconds the
+                      fixed sleeps would take and the seconds saved as values.
+    """
+    with _wait_stats_lock:
+        stats = {action: {'calls': calls, 'waited': round(waited, 3), 'fixed': round(fixed, 3),
+                          'saved': round(fixed - waited, 3)}
+                 for action, (calls, waited, fixed) in _wait_stats.items()}
 
-                    for col in cols:
-                        item_details[col] = []
-                else:
-                    index = 0
+        if _reset:
+            _wait_stats.clear()
 
-                    for key in item_details:
-                        # item_details[key].append(cols[index])
-                        item_details[key] = cols[index]
-                        index += 1
+    return stats
 
-    return item_details
 
+_find_elems_by_text_script = '''
+const text = arguments[0], visibleOnly = arguments[1], ranked = arguments[2], exact = [], partial = [];
+const walker = document.createTreeWalker(document.documentElement, NodeFilter.SHOW_ELEMENT);
+for (let elem = walker.currentNode; elem; elem = walker.nextNode()) {
+    let first = null, isExact = false;
+    for (const node of elem.childNodes) {
+        if (node.nodeType !== Node.TEXT_NODE) continue;
+        if (first === null) first = node.nodeValue;
+        if (node.nodeValue === text) isExact = true;
+    }
+    if (!isExact && (first === null || !first.includes(text))) continue;
+    if (visibleOnly && !elem.getClientRects().length) continue;
+    (isExact && ranked ? exact : partial).push(elem);
+}
+return exact.concat(partial);
+'''
 
-def get_installed_chrome_version():
-    osname = platform.system()
 
-    if osname == 'Darwin':
-        install_path = "/Applications/Google\ Chrome.app/Contents/MacOS/Google\ Chrome"
-        version_string = ""
-        return version_string
+def find_elems_by_text(driver, elem_text, _visible=False, _ranked=True):
+    """This function looks up the elements having the specified text in a single call to the browser.
 
-    elif osname == 'Windows':
-        product_details = get_windows_chrome_version()
-        return product_details["FileVersion"]
-    elif osname == 'Linux':
-        install_path = "/usr/bin/google-chrome"
-        cmd = "google-chrome --version"
-    else:
-        raise NotImplemented(f"Unknown OS '{osname}'")
+    An element matches if one of its own text nodes equals the text, or its first text node contains it,
+    like the text()= and contains(text(), ...) XPaths. The text is passed as an argument so it may hold any quotes.
 
+    Args:
+        driver (WebDriver): The Chrome driver object to handle the Chrome browser.
+        elem_text (str): The visible text of the elements that you want to look for.
+        _visible (bool): If True then only the elements that are displayed are returned.
+        _ranked (bool): If False then every match is returned in the order of the page.
 
-def download_chrome_driver_for_specific_version_of_chrome_browser(chrome_version):
-    chrome_driver_filename = ''
+    Returns:
+        WebDriverElement (list): The exact matches followed by the other matches, each in the order of the page.
+    """
+    return driver.execute_script(_find_elems_by_text_script, elem_text, _visible, _ranked) or []
 
-    response = requests.get(chrome_driver_downloads_url)
 
-    if response.status_code == 200:
-        tree = html.fromstring(response.content)
+def wait_for_ranked_elems_by_text(driver, elem_text, _elem_index=0, _wait_in_secs=10, _visible=False):
+    """This function polls find_elems_by_text until the element at the specified index is present.
 
-        major_chrome_version = chrome_version.split('.')[0]
-        chrome_version_link = get_tag_text(tree, f'.//a[contains(text(), "ChromeDriver {major_chrome_version}.")]/@href')
+    Exact matches are ranked first only for the first element (index 0), other indexes count the matches
+    in the order of the page as they always did.
 
-        if chrome_version_link:
-            chrome_path = chrome_version_link.split('path=')[-1].replace('/', '').strip()
-            chrome_download_link = f'https://chromedriver.storage.googleapis.com/{chrome_path}/chromedriver_win32.zip'
-            chrome_driver_name = Path(chrome_download_link).name
+    Returns:
+        WebDriverElement (list): The ranked elements if found in time, Otherwise False
+    """
 
-            print('Downloading chromedriver...')
-            chrome_driver_filename = wget.download(chrome_download_link, chrome_driver_name)
-            print('Chromedriver downloaded successfully!')
-        else:
-            print(f'Unable to find Chrome Driver Version link from Chrome Downloads page: {chrome_driver_downloads_url}')
-    else:
-        print(f'Unable to fetch Chrome Driver Version link from Chrome Downloads link: {chrome_driver_downloads_url}')
+    def find(d):
+        elems = find_elems_by_text(d, elem_text, _visible=_visible, _ranked=_elem_index == 0)
+        return elems if len(elems) > _elem_index else False
 
-    return chrome_driver_filename
+    try:
+        return WebDriverWait(driver, _wait_in_secs, poll_frequency=0.1).until(find)
+    except exceptions.TimeoutException:
+        return False
 
 
-def extract_chrome_driver_file_to_dest_dir(chrome_driver_filename, chrome_executable_path):
+# Following are the Functions to capture the network responses of the browser.
 
-    chrome_executable_filepath = f'{chrome_executable_path}/{chrome_executable_filename}'
 
-    with ZipFile(chrome_driver_filename, 'r') as _zip:
-        # printing all the contents of the zip file
-        _zip.printdir()
+class NetworkRecorder:
+    """This class collects the responses of the requests the page makes, e.g. the JSON APIs it loads its data from,
+    so they can be used instead of parsing the rendered page.
 
-        print('Extracting all the files now...')
-        _zip.extractall()
+    It reads the performance log of the browser, so the driver needs to be opened with load_driver(_capture_network=True).
+    The log is drained on every read, so only one recorder should be used per driver.
 
-    shutil.move(chrome_executable_filename, chrome_executable_filepath)
-    print(f'Placed "{chrome_executable_filename}" to {chrome_executable_filepath}.')
+    Args:
+        driver (WebDriver): The Chrome driver object to handle the Chrome browser.
+        _url_patterns (tuple): The URL patterns of the responses to record, * matches any characters.
+        _resource_types (tuple): The resource types of the responses to record, e.g. XHR, Fetch or Document.
+    """
 
-    os.remove(chrome_driver_filename)
-    print(f'Removed {chrome_driver_filename} from current directory.')
+    def __init__(self, driver, _url_patterns=('*',), _resource_types=('XHR', 'Fetch')):
+        self.driver = driver
+        self.url_patterns = _url_patterns
+        self.resource_types = _resource_types
 
+        self.responses = []
 
-def download_chrome_driver(download_path=''):
+        self._requests = {}
+        self._pending = {}
 
-    if not download_path:
-        download_path = local_storage_path
+    def _matches(self, url):
+        return any(fnmatchcase(url, pattern) for pattern in self.url_patterns)
 
-    chrome_version = get_installed_chrome_version()
+    def _get_body(self, request_id, mime_type):
+        try:
+            result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except Exception:
+            # The body is gone once the page navigated away or the browser evicted it.
+            return None
 
-    chrome_driver_filename = download_chrome_driver_for_specific_version_of_chrome_browser(chrome_version)
+        body = result.get('body', '')
 
-    if chrome_driver_filename:
-        extract_chrome_driver_file_to_dest_dir(chrome_driver_filename, download_path)
+        if result.get('base64Encoded'):
+            return base64.b64decode(body)
 
-    print('Successfully downloaded the chromedriver.')
+        if 'json' in mime_type or body[:1] in ('{', '['):
+            try:
+                return json.loads(body)
+            except ValueError:
+                pass
 
+        return body
 
-def get_recursive_filepaths(directory):
-    """
-    This function will generate the file names in a directory
-    tree by walking the tree either top-down or bottom-up. For each
-    directory in the tree rooted at directory top (including top itself),
-    it yields a 3-tuple (dirpath, dirnames, filenames).
-    """
-    file_paths = []
+    def collect(self):
+        """This function reads the new entries of the performance log and records the responses that finished loading.
 
-    for root, directories, files in os.walk(directory):
+        Returns:
+            responses (list): A dictionary of url, method, status, mime_type, request_headers, post_data and body
+                              for every new response, body is the parsed JSON for JSON responses.
+        """
+        responses = []
 
-        for filename in files:
-            filepath = os.path.join(root, filename)
-            file_paths.append(filepath)
+        for entry in self.driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            method = message.get('method')
+            params = message.get('params', {})
 
-    return file_paths
+            if method == 'Network.requestWillBeSent':
+                self._requests[params['requestId']] = params['request']
 
+            elif method == 'Network.responseReceived':
 
-def get_filepaths(directory, _extension='html', _depth=1):
-    directory = directory.replace('./', '').strip('/')
-    directory_depth = '/*' * _depth
+                if params.get('type') in self.resource_types and self._matches(params['response']['url']):
+                    self._pending[params['requestId']] = params['response']
+                else:
+                    self._requests.pop(params['requestId'], None)
 
-    if ':/' not in directory:
-        directory_path_pattern = f'./{directory}{directory_depth}.{_extension}'
-    else:
-        directory_path_pattern = f'{directory}{directory_depth}.{_extension}'
+            elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+                response = self._pending.pop(params['requestId'], None)
+                request = self._requests.pop(params['requestId'], {})
 
-    filepaths = glob(directory_path_pattern)
+                if response is None or method == 'Network.loadingFailed':
+                    continue
 
-    print(f'Fetching Files | Count: {len(filepaths)} | Dir: {directory_path_pattern}')
+                mime_type = response.get('mimeType', '')
 
-    return filepaths
+                responses.append({
+                    'url': response['url'],
+                    'method': request.get('method', 'GET'),
+                    'status': response.get('status'),
+                    'mime_type': mime_type,
+                    'request_headers': request.get('headers', {}),
+                    'post_data': request.get('postData'),
+                    'body': self._get_body(params['requestId'], mime_type),
+                })
 
+        self.responses.extend(responses)
 
-def generate_card_ids(starting_id, ending_id):
-    return {str(card_id): '' for card_id in range(starting_id, ending_id + 1)}
+        return responses
 
+    def wait_for_responses(self, _count=1, _wait_in_secs=10, _poll_in_secs=0.1):
+        """This function collects until the specified number of new responses is recorded or the time is up.
 
-def remove_existing_files(card_ids, dir_pattern):
-    scraped_card_ids = glob(dir_pattern)
+        Returns:
+            responses (list): The new responses, as returned by collect
+        """
+        responses = []
+        deadline = monotonic() + _wait_in_secs
 
-    for file_path in scraped_card_ids:
-        card_id = Path(file_path).stem
+        while True:
+            responses.extend(self.collect())
 
-        try:
-            del card_ids[card_id]
-        except KeyError:
-            pass
+            if len(responses) >= _count or monotonic() >= deadline:
+                return responses
 
+            sleep(_poll_in_secs)
 
-# Below are the Selenium Browser utils.
+    def get_json(self, _url_pattern='*'):
+        """This function returns the parsed JSON bodies of the recorded responses matching the URL pattern."""
+        return [response['body'] for response in self.responses
+                if isinstance(response['body'], (dict, list)) and fnmatchcase(response['url'], _url_pattern)]
 
+    def clear(self):
+        """This function drops the recorded responses and the unread entries of the performance log."""
+        self.collect()
+        self.responses = []
 
-def load_driver(headless=False):
-    """This function opens a Chrome browser after some configurations and returns chrome driver object.
 
-    Args:
-        headless (bool): True to run the Chrome browser in the foreground otherwise it will run in background.
+def create_session_from_driver(driver):
+    """This function creates a pooled session with the cookies and user agent of the browser, so the endpoints
+    recorded by NetworkRecorder can be fetched directly, e.g. with get_json.
 
     Returns:
-        driver (WebDriver): The Chrome driver object to handle the Chrome browser.
+        session (Session): The session holding the cookies of the browser.
     """
-    chrome_options = Options()
-
-    chrome_options.add_argument("--start-maximized")
-    chrome_options.add_argument("--disable-notifications")
-    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-
-    if headless:
-        chrome_options.add_argument("--headless")
-
-    chrome_executable_filepath = f'{local_storage_path}/{chrome_executable_filename}'
+    session = create_session(_headers={'User-Agent': driver.execute_script('return navigator.userAgent')})
 
-    try:
-        driver = webdriver.Chrome(options=chrome_options, executable_path=chrome_executable_filepath)
-    except exceptions.WebDriverException:
-        driver = webdriver.Chrome(options=chrome_options)
+    for cookie in driver.get_cookies():
+        session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
 
-    return driver
+    return session
 
 
 # Following are the Functions to interact with multiple elements.
@@ -834,22 +4309,7 @@ def wait_for_elems_by_text(driver, elem_text, _elem_index=0, _wait_in_secs=10, _
     Returns:
         WebDriverElement (list): if it is found successfully, Otherwise False
     """
-    elems_by_having_text_xpath = f'.//*[contains(text(), "{elem_text}")]'
-
-    elems = wait_for_elems(driver, elems_by_having_text_xpath, _wait_in_secs)
-
-    if len(elems) > 1 and _elem_index == 0:
-        elems_by_exact_text_xpath = f'.//*[text()="{elem_text}"]'
-
-        exact_elems = wait_for_elems(driver, elems_by_exact_text_xpath)
-
-        if len(exact_elems) == 1:
-            elems = exact_elems
-
-    if _elem_index >= len(elems):
-        return False
-
-    return elems
+    return wait_for_ranked_elems_by_text(driver, elem_text, _elem_index, _wait_in_secs, _visible=False)
 
 
 def locate_elems(driver, elems_xpath, _wait_in_secs=10):
@@ -883,22 +4343,7 @@ def locate_elems_by_text(driver, elems_text, _elem_index=0, _wait_in_secs=10):
     Returns:
         WebDriverElement (list): if it is found successfully, Otherwise False
     """
-    elems_by_having_text_xpath = f'.//*[contains(text(), "{elems_text}")]'
-
-    elems = locate_elems(driver, elems_by_having_text_xpath, _wait_in_secs)
-
-    if len(elems) > 1 and _elem_index == 0:
-        elems_by_exact_text_xpath = f'.//*[text()="{elems_text}"]'
-
-        exact_elems = locate_elems(driver, elems_by_exact_text_xpath, _wait_in_secs)
-
-        if len(exact_elems) == 1:
-            elems = exact_elems
-
-    if _elem_index >= len(elems):
-        return False
-
-    return elems
+    return wait_for_ranked_elems_by_text(driver, elems_text, _elem_index, _wait_in_secs, _visible=True)
 
 
 # Following are the Functions to interact with single elements.
@@ -977,7 +4422,7 @@ def locate_elem_by_text(driver, elem_text, _elem_index=0, _wait_in_secs=10):
     Returns:
         element (WebDriverElement): It returns the specific element from the list.
     """
-    elems = locate_elems_by_text(driver, elem_text, _elem_index=_elem_index, _wait_in_secs=10)
+    elems = locate_elems_by_text(driver, elem_text, _elem_index=_elem_index, _wait_in_secs=_wait_in_secs)
 
     return elems[_elem_index]
 
@@ -1015,7 +4460,7 @@ def click_elem(driver, elem_xpath, _wait_in_secs=10, _sleep=0.2):
 
     elem_to_click.click()
 
-    sleep(_sleep)
+    settle(driver, _sleep, 'click_elem')
 
 
 def click_elem_by_text(driver, elem_text, _elem_index=0, _wait_in_secs=10, _sleep=0.2):
@@ -1029,11 +4474,11 @@ def click_elem_by_text(driver, elem_text, _elem_index=0, _wait_in_secs=10, _slee
         _sleep (float): The time for which WebDriver waits after performing the action
                         so the page could be loaded successfully and for the smooth experience with WebDriver.
     """
-    elems = locate_elems_by_text(driver, elem_text, _wait_in_secs)
+    elems = locate_elems_by_text(driver, elem_text, _elem_index=_elem_index, _wait_in_secs=_wait_in_secs)
 
     driver.execute_script("arguments[0].click();", elems[_elem_index])
 
-    sleep(_sleep)
+    settle(driver, _sleep, 'click_elem_by_text')
 
 
 def extract_elem_text(driver, elem_xpath, _wait_in_secs=5):
@@ -1063,7 +4508,7 @@ def send_keys_to_elem(driver, elem_xpath, keys, _clear=True, _wait_in_secs=10, _
         elem_to_send_keys_to.clear()
 
     elem_to_send_keys_to.send_keys(keys)
-    sleep(_sleep)
+    settle(driver, _sleep, 'send_keys_to_elem')
 
 
 def send_keys_to_elem_by_text(driver, elem_text, keys, _clear=True, _wait_in_secs=10, _sleep=0.2):
@@ -1078,21 +4523,209 @@ def send_keys_to_elem_by_text(driver, elem_text, keys, _clear=True, _wait_in_sec
         _sleep (float): The time for which WebDriver waits after performing the action
                         so the page could be loaded successfully and for the smooth experience with WebDriver.
     """
-    elem_to_send_keys_to = locate_elem_by_text(driver, elem_text, _wait_in_secs)
+    elem_to_send_keys_to = locate_elem_by_text(driver, elem_text, _wait_in_secs=_wait_in_secs)
 
     if _clear:
         elem_to_send_keys_to.clear()
 
     elem_to_send_keys_to.send_keys(keys)
 
-    sleep(_sleep)
+    settle(driver, _sleep, 'send_keys_to_elem_by_text')
+
+
+# Following are the Functions to extract many elements in bulk.
+
+
+_extract_records_script = '''
+const rowsXpath = arguments[0], fields = arguments[1], harvest = arguments[2] || '';
+const evaluate = (xpath, context) => {
+    const result = document.evaluate(xpath, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const nodes = [];
+    for (let i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+    return nodes;
+};
+const getText = node => node.nodeType === Node.ELEMENT_NODE ? node.innerText || node.textContent : node.nodeValue;
+const rows = evaluate(rowsXpath, document).filter(row => !harvest || !row.hasAttribute('data-harvested')).map(row => {
+    const texts = fields.map(([xpath, all]) => {
+        const texts = evaluate(xpath, row).map(node => (getText(node) || '').trim());
+        return all ? texts : texts.slice(0, 1);
+    });
+    // Harvested rows are marked, so the next call only returns the new ones, or removed to keep the DOM small.
+    if (harvest === 'prune') row.remove();
+    else if (harvest) row.setAttribute('data-harvested', '1');
+    return texts;
+});
+if (!harvest) return rows;
+window.scrollTo(0, document.body.scrollHeight);
+return [rows, document.body.scrollHeight];
+'''
+
+
+def _split_field(xpath):
+    """This function returns the (xpath, separator, clean) of a field of the schema accepted by get_tags_text."""
+    if not isinstance(xpath, tuple):
+        return xpath, '', None
+
+    return xpath[0], xpath[1], xpath[2] if len(xpath) > 2 else None
+
+
+def extract_records(driver, rows_xpath, fields, _wait_in_secs=10):
+    """This function extracts a schema of fields for every matching row of the page in a single call to the browser.
+
+    The texts are cleaned like get_tags_text, so xpaths of text() nodes and attributes (@href) give the same values
+    on a live page as on a saved page, and xpaths of elements give their visible text.
+
+    Args:
+        driver (WebDriver): The Chrome driver object to handle the Chrome browser.
+        rows_xpath (str): The xpath of the rows, e.g. .//table//tr
+        fields (dict): The schema of fields as accepted by get_tags_text, with xpaths relative to a row.
+        _wait_in_secs (int): WebDriver waits for specified number of seconds for the first row to be present.
+
+    Returns:
+        records (list): A dictionary of the names of the fields and their values for every row.
+    """
+    specs = [_split_field(xpath) for xpath in fields.values()]
+    arguments = [[xpath, bool(separator)] for xpath, separator, _ in specs]
+
+    try:
+        rows = WebDriverWait(driver, _wait_in_secs, poll_frequency=0.1).until(
+            lambda d: d.execute_script(_extract_records_script, rows_xpath, arguments))
+    except exceptions.TimeoutException:
+        return []
+
+    return [_get_record(fields, specs, row) for row in rows]
+
+
+def _get_record(fields, specs, texts_of_fields):
+    """This function joins and cleans the texts returned by _extract_records_script like get_tags_text."""
+    record = {}
+
+    for name, (xpath, separator, clean), texts in zip(fields, specs, texts_of_fields):
+        text = separator.join([normalize_whitespace(text, _escaped_newlines=True) for text in texts])
+        record[name] = clean(text) if clean is not None else text
+
+    return record
+
+
+def extract_records_from_source(driver, rows_xpath, fields):
+    """This function snapshots the page source once and extracts a schema of fields for every matching row with lxml.
+
+    Unlike extract_records it sees the text of hidden elements too, as the text of the markup is used.
+
+    Args:
+        driver (WebDriver): The Chrome driver object to handle the Chrome browser.
+        rows_xpath (str): The xpath of the rows, e.g. .//table//tr
+        fields (dict): The schema of fields as accepted by get_tags_text, with xpaths relative to a row.
+
+    Returns:
+        records (list): A dictionary of the names of the fields and their values for every row.
+    """
+    tree = html.fromstring(driver.page_source)
+
+    return [get_tags_text(row, fields) for row in compile_xpath(rows_xpath)(tree)]
+
+
+def compare_extraction_timings(driver, rows_xpath, fields):
+    """This function times extracting the same schema per element, with extract_records and with
+    extract_records_from_source on the current page, to choose the fastest for a site.
+
+    Returns:
+        timings (dict): The name of every path as keys and a dictionary of seconds and number of rows as values.
+    """
+    timings = {}
+
+    started = monotonic()
+    rows = driver.find_elements(By.XPATH, rows_xpath)
+    count = 0
+
+    for row in rows:
+
+        for xpath in fields.values():
+            # WebDriver only returns elements, so read attributes and text() nodes from their parent elements.
+            elems_xpath, _, attribute = _split_field(xpath)[0].rpartition('/@')
+
+            if not elems_xpath:
+                elems_xpath, attribute = _split_field(xpath)[0].removesuffix('/text()'), None
+
+            for elem in row.find_elements(By.XPATH, elems_xpath):
+                count += len(elem.get_attribute(attribute) or '') if attribute else len(elem.text)
+
+    timings['per_element'] = {'seconds': round(monotonic() - started, 3), 'rows': len(rows)}
+
+    for name, extract in (('script', partial(extract_records, _wait_in_secs=0)),
+                          ('page_source', extract_records_from_source)):
+        started = monotonic()
+        records = extract(driver, rows_xpath, fields)
+        timings[name] = {'seconds': round(monotonic() - started, 3), 'rows': len(records)}
+
+    return timings
+
+
+def harvest_scrolled_items(driver, items_xpath, fields, _key=None, _max_items=None, _stop_at=None, _prune=False,
+                           _pause_in_scroll=1, _max_idle_scrolls=3):
+    """This function scrolls an infinite feed and yields the new items after every scroll, instead of scrolling
+    to the bottom first and parsing the whole page at the end.
+
+    Every step extracts the items that were not harvested yet and scrolls down in a single call to the browser,
+    then waits like the other helpers (see configure_waits).
+
+    Args:
+        driver (WebDriver): The Chrome driver object to handle the Chrome browser.
+        items_xpath (str): The xpath of the items of the feed.
+        fields (dict): The schema of fields as accepted by extract_records, with xpaths relative to an item.
+        _key (str): The name of the field identifying an item, the first field by default.
+                    Items with a key that was already yielded are skipped.
+        _max_items (int): The number of items after which the harvest stops.
+        _stop_at (set): Keys of items harvested before (e.g. a URLSet), the harvest stops at the first one seen.
+        _prune (bool): If True then harvested items are removed from the page to keep its memory bounded,
+                       Otherwise they are only marked.
+        _pause_in_scroll (float): The fixed time to wait after every scroll when the adaptive waits are off.
+        _max_idle_scrolls (int): The number of scrolls in a row without new items or height after which it stops.
+
+    Yields:
+        record (dict): The names of the fields and their values for every new item.
+    """
+    specs = [_split_field(xpath) for xpath in fields.values()]
+    arguments = [[xpath, bool(separator)] for xpath, separator, _ in specs]
+
+    key = _key or next(iter(fields))
+    seen = set()
+    idle_scrolls = 0
+    last_height = None
+
+    while idle_scrolls < _max_idle_scrolls:
+        rows, height = driver.execute_script(_extract_records_script, items_xpath, arguments,
+                                             'prune' if _prune else 'mark')
+        new_items = 0
+
+        for row in rows:
+            record = _get_record(fields, specs, row)
+
+            if _stop_at is not None and record[key] in _stop_at:
+                return
+
+            if record[key] in seen:
+                continue
+
+            seen.add(record[key])
+            new_items += 1
+
+            yield record
+
+            if _max_items is not None and len(seen) >= _max_items:
+                return
+
+        idle_scrolls = 0 if new_items or height != last_height else idle_scrolls + 1
+        last_height = height
+
+        settle(driver, _pause_in_scroll, 'harvest_scrolled_items')
 
 
 # Following are the Functions to perform certain actions on the Frontend using driver.
 
 
 def save_browser_page_locally(driver, file_path, _sleep=0.25):
-    sleep(_sleep)
+    settle(driver, _sleep, 'save_browser_page_locally')
     page_content = driver.page_source
 
     writer = get_writer(file_path)
@@ -1129,7 +4762,7 @@ def wait_until_url_contains_text(driver, elem_text, _wait_in_secs=10, _sleep=0.5
     try:
         WebDriverWait(driver, _wait_in_secs).until(
             EC.url_contains(elem_text))
-        sleep(_sleep)
+        settle(driver, _sleep, 'wait_until_url_contains_text')
         return True
     except exceptions.TimeoutException:
         return False
@@ -1152,7 +4785,7 @@ def switch_to_iframe(driver, _iframe_xpath='.//iframe', _wait_in_secs=10, _sleep
 
     if iframe:
         driver.switch_to.frame(iframe)
-        sleep(_sleep)
+        settle(driver, _sleep, 'switch_to_iframe')
         return True
 
     return False
@@ -1181,7 +4814,7 @@ def scroll_down_to_bottom_of_page(driver, _pause_in_scroll=1):
         # Scroll down to bottom
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
 
-        sleep(_pause_in_scroll)
+        settle(driver, _pause_in_scroll, 'scroll_down_to_bottom_of_page')
 
         # Calculate new scroll height and compare with last scroll height
         new_height = driver.execute_script("return document.body.scrollHeight")
@@ -1198,7 +4831,7 @@ def scroll_to_elem(driver, elem_xpath, _wait_in_secs=10, _pause_in_scroll=1):
     if elem:
         driver.execute_script('arguments[0].scrollIntoView();', elem)
 
-        sleep(_wait_in_secs)
+        settle(driver, _pause_in_scroll, 'scroll_to_elem')
 
         return elem
     else: